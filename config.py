@@ -1,73 +1,79 @@
 import os
-from typing import Dict, Any
+import functools
+from dataclasses import dataclass
+from typing import Optional, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# API Keys
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+def _api_keys(name: str) -> Tuple[str, ...]:
+    """Key pool from comma-separated <name>S, falling back to the single <name>"""
+    pool = os.getenv(f"{name}S")
+    if pool:
+        return tuple(key.strip() for key in pool.split(",") if key.strip())
+    key = os.getenv(name)
+    return (key,) if key else ()
+
+# API Keys (a pool per provider; requests rotate across the keys in a pool)
+GEMINI_API_KEYS = _api_keys("GEMINI_API_KEY")
+OPENAI_API_KEYS = _api_keys("OPENAI_API_KEY")
+ANTHROPIC_API_KEYS = _api_keys("ANTHROPIC_API_KEY")
+GEMINI_API_KEY = GEMINI_API_KEYS[0] if GEMINI_API_KEYS else None
+OPENAI_API_KEY = OPENAI_API_KEYS[0] if OPENAI_API_KEYS else None
+ANTHROPIC_API_KEY = ANTHROPIC_API_KEYS[0] if ANTHROPIC_API_KEYS else None
 
 # Default parameters
 DEFAULT_TEMPERATURE = 0.7
 DEFAULT_TOP_P = 0.95
 DEFAULT_MAX_TOKENS = 1024
 
-# API Provider Configurations
+@dataclass(slots=True, frozen=True)
+class ProviderConfig:
+    """Immutable provider configuration shared by all clients"""
+    api_key: Optional[str]
+    base_url: str
+    model: str
+    temperature: float = DEFAULT_TEMPERATURE
+    top_p: float = DEFAULT_TOP_P
+    max_tokens: int = DEFAULT_MAX_TOKENS
+    api_keys: Tuple[str, ...] = ()
+
+# Provider endpoints: (base_url, api_keys), shared by every model on that endpoint
+_GEMINI = ("https://generativelanguage.googleapis.com/v1beta/openai", GEMINI_API_KEYS)
+_OPENAI = ("https://api.openai.com/v1", OPENAI_API_KEYS)
+_ANTHROPIC = ("https://api.anthropic.com/v1", ANTHROPIC_API_KEYS)
+
+# Provider name -> (endpoint, model)
+_PROVIDER_MODELS = {
+    "gemini": (_GEMINI, "gemini-2.5-flash"),
+    "gemini-pro": (_GEMINI, "gemini-2.5-pro"),
+    "openai": (_OPENAI, "gpt-4"),
+    "openai-gpt3": (_OPENAI, "gpt-3.5-turbo"),
+    "anthropic": (_ANTHROPIC, "claude-3-sonnet-20240229"),
+}
+
+# API Provider Configurations (one shared frozen instance per provider, built at import)
 API_PROVIDERS = {
-    "gemini": {
-        "api_key": GEMINI_API_KEY,
-        "base_url": "https://generativelanguage.googleapis.com/v1beta/openai",
-        "model": "gemini-2.5-flash",
-        "temperature": DEFAULT_TEMPERATURE,
-        "top_p": DEFAULT_TOP_P,
-        "max_tokens": DEFAULT_MAX_TOKENS
-    },
-    "gemini-pro": {
-        "api_key": GEMINI_API_KEY,
-        "base_url": "https://generativelanguage.googleapis.com/v1beta/openai",
-        "model": "gemini-2.5-pro",
-        "temperature": DEFAULT_TEMPERATURE,
-        "top_p": DEFAULT_TOP_P,
-        "max_tokens": DEFAULT_MAX_TOKENS
-    },
-    "openai": {
-        "api_key": OPENAI_API_KEY,
-        "base_url": "https://api.openai.com/v1",
-        "model": "gpt-4",
-        "temperature": DEFAULT_TEMPERATURE,
-        "top_p": DEFAULT_TOP_P,
-        "max_tokens": DEFAULT_MAX_TOKENS
-    },
-    "openai-gpt3": {
-        "api_key": OPENAI_API_KEY,
-        "base_url": "https://api.openai.com/v1",
-        "model": "gpt-3.5-turbo",
-        "temperature": DEFAULT_TEMPERATURE,
-        "top_p": DEFAULT_TOP_P,
-        "max_tokens": DEFAULT_MAX_TOKENS
-    },
-    "anthropic": {
-        "api_key": ANTHROPIC_API_KEY,
-        "base_url": "https://api.anthropic.com/v1",
-        "model": "claude-3-sonnet-20240229",
-        "temperature": DEFAULT_TEMPERATURE,
-        "top_p": DEFAULT_TOP_P,
-        "max_tokens": DEFAULT_MAX_TOKENS
-    }
+    name: ProviderConfig(
+        api_key=api_keys[0] if api_keys else None, base_url=base_url, model=model, api_keys=api_keys
+    )
+    for name, ((base_url, api_keys), model) in _PROVIDER_MODELS.items()
 }
 
-def get_provider_config(provider: str) -> Dict[str, Any]:
-    """Get configuration for specified provider"""
+# Provider names, precomputed once (immutable, safe to share)
+AVAILABLE_PROVIDERS: Tuple[str, ...] = tuple(API_PROVIDERS.keys())
+_AVAILABLE_STR = ", ".join(AVAILABLE_PROVIDERS)
+
+@functools.lru_cache(maxsize=None)
+def get_provider_config(provider: str) -> ProviderConfig:
+    """Get configuration for specified provider (shared, read-only instance)"""
     if provider not in API_PROVIDERS:
-        available = ", ".join(API_PROVIDERS.keys())
-        raise ValueError(f"Unsupported provider: {provider}. Available: {available}")
+        raise ValueError(f"Unsupported provider: {provider}. Available: {_AVAILABLE_STR}")
     
-    config = API_PROVIDERS[provider].copy()
+    config = API_PROVIDERS[provider]
     
     # Check if API key is available
-    if not config.get("api_key"):
+    if not config.api_key:
         raise ValueError(f"API key not found for provider: {provider}")
     
     return config
\ No newline at end of file
@@ -1,247 +1,684 @@
-from openai import OpenAI
-from typing import Dict, Any, Optional, List
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+import httpx
+from typing import Dict, Any, Optional, List, Tuple, Iterator, AsyncIterator, Deque
+from dataclasses import replace
+from collections import deque, OrderedDict
+import asyncio
+import functools
+import hashlib
+import itertools
+import json
 import logging
+import re
 import time
+import weakref
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
+# Library logger - the application decides how logging is configured
 logger = logging.getLogger(__name__)
 
 import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import get_provider_config, API_PROVIDERS
+
+
+@functools.cache
+def _config():
+    """Import the repo-root config module on first use, not at import time"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.append(root)
+    import config
+    return config
+
+
+# HTTP/2 multiplexes concurrent requests over one connection; httpx needs the
+# optional 'h2' package for it (pip install httpx[http2]), else HTTP/1.1 is used
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+_HTTP_LIMITS = httpx.Limits(max_connections=200, max_keepalive_connections=200)
+
+# One keep-alive connection pool shared by every cached client below, so e.g. the
+# same endpoint used with different API keys still reuses warm connections
+_HTTP_CLIENT: Optional[httpx.Client] = None
+
+# Shared OpenAI clients keyed by (base_url, api_key) so every AIClient talking to
+# the same endpoint reuses one pooled httpx session (TCP/TLS keep-alive)
+_CLIENT_CACHE: Dict[Tuple[str, str], OpenAI] = {}
+
+# Async connections belong to the event loop that opened them, so the async pool
+# and clients are kept per loop instead of process-wide
+_ASYNC_HTTP_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], AsyncOpenAI]]" = weakref.WeakKeyDictionary()
+
+# Faster JSON for cache keys when available (optional dependency)
+try:
+    import orjson
+    
+    def _dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+except ImportError:
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode()
+
+# Only near-deterministic requests are worth caching by exact match
+_CACHEABLE_MAX_TEMPERATURE = 0.3
+
+# Shared event loop for sync batch helpers, so cached async clients keep their
+# connection pools between calls instead of being bound to a closed loop
+_RUNNER: Optional[asyncio.Runner] = None
+
+
+@functools.cache
+def _mock_providers() -> Tuple[str, ...]:
+    """Provider names the mock client reports, built once"""
+    return ("mock", *_config().AVAILABLE_PROVIDERS)
+
+# Canonical role strings: roles built at runtime (e.g. loaded from JSON) map back
+# to one shared object per role instead of a fresh string per message
+_ROLES = {role: sys.intern(role) for role in ("system", "user", "assistant")}
+
+
+def _canonical_role(role: str) -> str:
+    """Shared role string; non-str roles pass through unchanged (sys.intern needs a str)"""
+    if not isinstance(role, str):
+        return role
+    return _ROLES.get(role) or sys.intern(role)
+
+
+# Keyword buckets for mock responses and demo routing (substring match, case-insensitive)
+_CODE_RE = re.compile(r"code|python|function|program", re.I)
+_MATH_RE = re.compile(r"math|calculate|equation|solve", re.I)
+_TECH_RE = re.compile(r"code|bug|debug|technical", re.I)
+_BIZ_RE = re.compile(r"calculate|data|business|report", re.I)
+
+
+def _http_client() -> httpx.Client:
+    """Get the shared sync httpx client, creating it on first use"""
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is None:
+        _HTTP_CLIENT = DefaultHttpxClient(http2=_HTTP2, limits=_HTTP_LIMITS)
+    return _HTTP_CLIENT
+
+
+def _drop_closed_loops():
+    """Forget async clients of closed loops (pooled connections would keep the loop alive)"""
+    for loop in [loop for loop in _ASYNC_CLIENTS if loop.is_closed()]:
+        del _ASYNC_CLIENTS[loop]
+        _ASYNC_HTTP_CLIENTS.pop(loop, None)
+
+
+def _async_client(base_url: str, api_key: str) -> AsyncOpenAI:
+    """Get the cached async client for an endpoint/key on the running event loop"""
+    loop = asyncio.get_running_loop()
+    clients = _ASYNC_CLIENTS.get(loop)
+    if clients is None:
+        _drop_closed_loops()
+        clients = _ASYNC_CLIENTS[loop] = {}
+        _ASYNC_HTTP_CLIENTS[loop] = DefaultAsyncHttpxClient(http2=_HTTP2, limits=_HTTP_LIMITS)
+    client = clients.get((base_url, api_key))
+    if client is None:
+        client = clients[(base_url, api_key)] = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=_ASYNC_HTTP_CLIENTS[loop]
+        )
+    return client
+
+
+def _run(coro):
+    """Run a coroutine to completion on the shared event loop"""
+    global _RUNNER
+    if _RUNNER is None:
+        _RUNNER = asyncio.Runner()
+    return _RUNNER.run(coro)
+
+
+class _ResponseCache:
+    """In-memory LRU cache of responses with a per-entry TTL"""
+    
+    def __init__(self, max_size: int = 1024, ttl: float = 86400):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: str):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class _RateLimiter:
+    """Async limiter that spaces request starts evenly: at most `rate` per `period` seconds"""
+    
+    def __init__(self, rate: float, period: float = 60.0):
+        self._interval = period / rate
+        self._next_slot = 0.0
+    
+    async def acquire(self):
+        # Reserve the next free slot before awaiting, so concurrent callers queue up in order
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
 
 class ChatMessage:
-    """Chat message class"""
+    """Chat message class (kept for API compatibility; the clients store plain dicts)"""
+    
+    __slots__ = ("role", "content", "timestamp", "_dict")
     
     def __init__(self, role: str, content: str, timestamp: Optional[float] = None):
         self.role = role  # "user", "assistant", "system"
         self.content = content
         self.timestamp = timestamp or time.time()
+        self._dict: Optional[Dict[str, str]] = None
     
     def to_dict(self) -> Dict[str, str]:
-        return {
-            "role": self.role,
-            "content": self.content
-        }
+        """
+        OpenAI-format dict, built once and reused while role and content are unchanged
+        
+        The returned dict is shared between calls: copy it before mutating. If the
+        message or the dict was modified, a fresh dict is built.
+        """
+        d = self._dict
+        if d is None or d.get("role") is not self.role or d.get("content") is not self.content:
+            d = self._dict = {"role": self.role, "content": self.content}
+        return d
 
 
 class AIClient:
-    def __init__(self, provider: str = "gemini", api_key: Optional[str] = None):
+    def __init__(self, provider: str = "gemini", api_key: Optional[str] = None,
+                 max_history: int = 40, enable_cache: bool = False,
+                 cache_size: int = 1024, cache_ttl: float = 86400):
         """
         Initialize AI Client with specified provider
         
         Args:
             provider: API provider name (gemini, openai, anthropic, etc.)
             api_key: Optional API key override
+            max_history: Max messages kept in chat history, at least 1 (a leading system prompt is pinned and not counted)
+            enable_cache: Reuse responses for identical requests with temperature <= 0.3
+            cache_size: Max cached responses (LRU eviction)
+            cache_ttl: Seconds a cached response stays valid
         """
+        if max_history < 1:
+            raise ValueError(f"max_history must be at least 1, got {max_history}")
         self.provider = provider
-        self.chat_history: List[ChatMessage] = []
+        self.max_history = max_history
+        self._cache = _ResponseCache(cache_size, cache_ttl) if enable_cache else None
+        self._history: Deque[Dict[str, str]] = deque(maxlen=max_history)
+        self.system_message: Optional[Dict[str, str]] = None
         self._init_client(api_key)
         
     def _init_client(self, api_key_override: Optional[str] = None):
         """Initialize OpenAI-compatible client for specified provider"""
         try:
             # Get provider configuration
-            self.config = get_provider_config(self.provider)
+            self.config = _config().get_provider_config(self.provider)
             
             # Override API key if provided
             if api_key_override:
-                self.config["api_key"] = api_key_override
+                self.config = replace(self.config, api_key=api_key_override, api_keys=(api_key_override,))
+            cfg = self.config
             
-            # Initialize OpenAI client with provider's base URL
-            self.client = OpenAI(
-                api_key=self.config["api_key"],
-                base_url=self.config["base_url"]
+            # Cache request defaults so the hot path avoids config lookups
+            self._model, self._temp, self._top_p, self._max_tokens = (
+                cfg.model, cfg.temperature, cfg.top_p, cfg.max_tokens
             )
+            # Only OpenAI's own endpoint understands prompt_cache_key
+            self._prompt_cache = "api.openai.com" in cfg.base_url
             
-            logger.info(f"✅ {self.provider} client initialized (model: {self.config['model']})")
+            # Reuse a cached OpenAI client per endpoint/key; requests rotate round-robin
+            # across the provider's key pool, multiplying the per-key rate limit
+            # (async clients are looked up on the running loop at request time)
+            clients, keys = [], []
+            for api_key in cfg.api_keys or (cfg.api_key,):
+                key = (cfg.base_url, api_key)
+                keys.append(key)
+                clients.append(_CLIENT_CACHE.get(key) or _CLIENT_CACHE.setdefault(key, OpenAI(
+                    api_key=api_key,
+                    base_url=cfg.base_url,
+                    http_client=_http_client()
+                )))
+            self.client, self._aclient_key = clients[0], keys[0]
+            self._clients, self._aclient_keys = itertools.cycle(clients), itertools.cycle(keys)
+            
+            logger.info("✅ %s client initialized (model: %s)", self.provider, cfg.model)
             
         except Exception as e:
-            logger.warning(f"⚠️ Failed to initialize {self.provider} client: {e}")
+            logger.warning("⚠️ Failed to initialize %s client: %s", self.provider, e)
             raise
     
     @classmethod
-    def get_available_providers(cls) -> List[str]:
-        """Get list of available API providers"""
-        return list(API_PROVIDERS.keys())
+    def get_available_providers(cls) -> Tuple[str, ...]:
+        """Get available API providers (shared immutable tuple)"""
+        return _config().AVAILABLE_PROVIDERS
+    
+    @property
+    def aclient(self) -> AsyncOpenAI:
+        """Async client for the first API key, bound to the running event loop"""
+        return _async_client(*self._aclient_key)
+    
+    @classmethod
+    async def aclose_all(cls):
+        """Close the async OpenAI clients owned by the running event loop"""
+        loop = asyncio.get_running_loop()
+        for aclient in _ASYNC_CLIENTS.pop(loop, {}).values():
+            await aclient.close()
+        http_client = _ASYNC_HTTP_CLIENTS.pop(loop, None)
+        if http_client is not None:
+            await http_client.aclose()
+    
+    @classmethod
+    def close_all(cls):
+        """
+        Close all cached OpenAI clients (call on application shutdown)
+        
+        Async clients used from your own event loop must be closed on that loop
+        with `await AIClient.aclose_all()`; close_all() closes the ones on the
+        shared batch loop and drops those whose loop has already closed.
+        """
+        global _RUNNER, _HTTP_CLIENT
+        # Closing each client also closes the shared pool (closing twice is a no-op)
+        for client in _CLIENT_CACHE.values():
+            client.close()
+        _CLIENT_CACHE.clear()
+        _HTTP_CLIENT = None
+        
+        if _RUNNER is not None:
+            _RUNNER.run(cls.aclose_all())
+            _RUNNER.close()
+            _RUNNER = None
+        _drop_closed_loops()
     
     def add_message(self, role: str, content: str):
-        """Add message to chat history"""
-        message = ChatMessage(role, content)
-        self.chat_history.append(message)
+        """Add message to chat history (stored directly in OpenAI format)"""
+        message = {"role": _canonical_role(role), "content": content}
+        
+        # A system prompt opening the conversation is pinned; every later message, including
+        # further system messages, keeps its place and the deque's maxlen drops the oldest in O(1)
+        if message["role"] == "system" and self.system_message is None and not self._history:
+            self.system_message = message
+        else:
+            self._history.append(message)
     
     def get_chat_history(self) -> List[Dict[str, str]]:
-        """Get chat history in OpenAI format"""
-        return [msg.to_dict() for msg in self.chat_history]
+        """Get chat history in OpenAI format (pinned system prompt first, if set)"""
+        if self.system_message:
+            return [self.system_message, *self._history]
+        return list(self._history)
+    
+    @property
+    def chat_history(self) -> List[Dict[str, str]]:
+        """Chat history as a new list (same as get_chat_history())"""
+        return self.get_chat_history()
     
     def clear_history(self):
         """Clear chat history"""
-        self.chat_history = []
-        logger.info("🗑️ Chat history cleared")
+        self._history.clear()
+        self.system_message = None
+        logger.debug("🗑️ Chat history cleared")
+        
+    def _request_params(self, messages: List[Dict[str, str]], model: Optional[str] = None, 
+                        temperature: Optional[float] = None, top_p: Optional[float] = None,
+                        prompt_cache_key: Optional[str] = None) -> Dict[str, Any]:
+        """Build chat.completions.create() kwargs, using cached config defaults"""
+        params = {
+            "model": model or self._model,
+            "messages": messages,
+            "temperature": self._temp if temperature is None else temperature,
+            "top_p": self._top_p if top_p is None else top_p,
+            "max_tokens": self._max_tokens
+        }
+        # Route requests sharing a prompt prefix to the same server-side prompt cache
+        if prompt_cache_key and self._prompt_cache:
+            params["extra_body"] = {"prompt_cache_key": prompt_cache_key}
+        return params
+    
+    def _cache_key(self, params: Dict[str, Any]) -> Optional[str]:
+        """Content hash of a request, or None if it shouldn't be cached"""
+        if self._cache is None or params["temperature"] > _CACHEABLE_MAX_TEMPERATURE:
+            return None
+        return hashlib.sha256(_dumps({"provider": self.provider, **params})).hexdigest()
+    
+    def _complete(self, messages: List[Dict[str, str]], model: Optional[str] = None, 
+                  temperature: Optional[float] = None, top_p: Optional[float] = None,
+                  prompt_cache_key: Optional[str] = None) -> str:
+        """Run one chat completion and return the response text"""
+        params = self._request_params(messages, model, temperature, top_p, prompt_cache_key)
+        key = self._cache_key(params)
+        if key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                logger.debug("💾 %s response cache hit", self.provider)
+                return cached
         
-    def generate_text(self, prompt: str, model: Optional[str] = None, 
-                     temperature: Optional[float] = None, top_p: Optional[float] = None) -> str:
-        """Generate text using specified provider's API"""
         try:
-            # Clear history and add current prompt
-            self.clear_history()
-            self.add_message("user", prompt)
-            
-            # Use provided parameters or config defaults
-            model_name = model or self.config["model"]
-            temp = temperature or self.config["temperature"]
-            tp = top_p or self.config["top_p"]
-            max_tokens = self.config["max_tokens"]
-            
-            # Make API call
-            response = self.client.chat.completions.create(
-                model=model_name,
-                messages=self.get_chat_history(),
-                temperature=temp,
-                top_p=tp,
-                max_tokens=max_tokens
-            )
+            response = next(self._clients).chat.completions.create(**params)
             
             result = response.choices[0].message.content
             
             # Handle None content from API (common with content filtering)
             if result is None:
-                logger.warning(f"⚠️ API returned None content, using fallback")
-                result = f"[API response filtered or empty for: {prompt[:50]}...]"
-            
-            # Add response to history
-            self.add_message("assistant", result)
+                logger.warning("⚠️ API returned None content, using fallback")
+                return f"[API response filtered or empty for: {messages[-1]['content'][:50]}...]"
             
+            if key is not None:
+                self._cache.set(key, result)
             return result
                 
         except Exception as e:
-            logger.error(f"{self.provider} API call failed: {str(e)}")
+            logger.error("%s API call failed: %s", self.provider, e)
             raise Exception(f"API request failed: {str(e)}")
     
-    def chat(self, user_message: str, model: Optional[str] = None, 
-             temperature: Optional[float] = None, top_p: Optional[float] = None) -> str:
-        """Chat with conversation history"""
+    async def _acomplete(self, messages: List[Dict[str, str]], model: Optional[str] = None, 
+                         temperature: Optional[float] = None, top_p: Optional[float] = None,
+                         prompt_cache_key: Optional[str] = None) -> str:
+        """Async counterpart of _complete()"""
+        params = self._request_params(messages, model, temperature, top_p, prompt_cache_key)
+        key = self._cache_key(params)
+        if key is not None:
+            cached = self._cache.get(key)
+            if cached is not None:
+                logger.debug("💾 %s response cache hit", self.provider)
+                return cached
+        
         try:
-            # Add user message to history
-            self.add_message("user", user_message)
-            
-            # Use provided parameters or config defaults
-            model_name = model or self.config["model"]
-            temp = temperature or self.config["temperature"]
-            tp = top_p or self.config["top_p"]
-            max_tokens = self.config["max_tokens"]
-            
-            # Make API call with full history
-            response = self.client.chat.completions.create(
-                model=model_name,
-                messages=self.get_chat_history(),
-                temperature=temp,
-                top_p=tp,
-                max_tokens=max_tokens
-            )
+            response = await _async_client(*next(self._aclient_keys)).chat.completions.create(**params)
             
             result = response.choices[0].message.content
             
             # Handle None content from API (common with content filtering)
             if result is None:
-                logger.warning(f"⚠️ API returned None content, using fallback")
-                result = f"[API response filtered or empty for: {user_message[:50]}...]"
-            
-            # Add response to history
-            self.add_message("assistant", result)
+                logger.warning("⚠️ API returned None content, using fallback")
+                return f"[API response filtered or empty for: {messages[-1]['content'][:50]}...]"
             
+            if key is not None:
+                self._cache.set(key, result)
             return result
                 
         except Exception as e:
-            logger.error(f"{self.provider} chat API call failed: {str(e)}")
+            logger.error("%s async API call failed: %s", self.provider, e)
             raise Exception(f"API request failed: {str(e)}")
     
+    def generate_text(self, prompt: str, model: Optional[str] = None, 
+                     temperature: Optional[float] = None, top_p: Optional[float] = None) -> str:
+        """Generate text using specified provider's API"""
+        # Clear history only if there is any (stateless calls usually start empty), then add the prompt
+        if self._history or self.system_message:
+            self.clear_history()
+        self.add_message("user", prompt)
+        
+        result = self._complete(self.get_chat_history(), model, temperature, top_p)
+        
+        # Add response to history
+        self.add_message("assistant", result)
+        return result
+    
+    def chat(self, user_message: str, model: Optional[str] = None, 
+             temperature: Optional[float] = None, top_p: Optional[float] = None,
+             prompt_cache_key: Optional[str] = None) -> str:
+        """
+        Chat with conversation history
+        
+        Pass a stable prompt_cache_key (e.g. a conversation or system-prompt id) so
+        OpenAI can reuse its prompt cache for the resent history prefix. Ignored by
+        other providers.
+        """
+        self.add_message("user", user_message)
+        result = self._complete(self.get_chat_history(), model, temperature, top_p, prompt_cache_key)
+        self.add_message("assistant", result)
+        return result
+    
+    def stream_chat(self, user_message: str, model: Optional[str] = None, 
+                    temperature: Optional[float] = None, top_p: Optional[float] = None,
+                    prompt_cache_key: Optional[str] = None) -> Iterator[str]:
+        """Chat with conversation history, yielding response text as it arrives"""
+        self.add_message("user", user_message)
+        parts: List[str] = []
+        try:
+            stream = next(self._clients).chat.completions.create(
+                **self._request_params(self.get_chat_history(), model, temperature, top_p, prompt_cache_key),
+                stream=True
+            )
+            for chunk in stream:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    parts.append(text)
+                    yield text
+        except Exception as e:
+            logger.error("%s streaming API call failed: %s", self.provider, e)
+            raise Exception(f"API request failed: {str(e)}")
+        
+        # Record the full response once the stream is complete
+        self.add_message("assistant", "".join(parts))
+    
+    async def astream_chat(self, user_message: str, model: Optional[str] = None, 
+                           temperature: Optional[float] = None, top_p: Optional[float] = None,
+                           prompt_cache_key: Optional[str] = None) -> AsyncIterator[str]:
+        """Async counterpart of stream_chat()"""
+        self.add_message("user", user_message)
+        parts: List[str] = []
+        try:
+            stream = await _async_client(*next(self._aclient_keys)).chat.completions.create(
+                **self._request_params(self.get_chat_history(), model, temperature, top_p, prompt_cache_key),
+                stream=True
+            )
+            async for chunk in stream:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if text:
+                    parts.append(text)
+                    yield text
+        except Exception as e:
+            logger.error("%s async streaming API call failed: %s", self.provider, e)
+            raise Exception(f"API request failed: {str(e)}")
+        
+        self.add_message("assistant", "".join(parts))
+    
+    async def achat(self, user_message: str, model: Optional[str] = None, 
+                    temperature: Optional[float] = None, top_p: Optional[float] = None,
+                    prompt_cache_key: Optional[str] = None) -> str:
+        """Async chat with conversation history (don't run several concurrently on one client)"""
+        self.add_message("user", user_message)
+        result = await self._acomplete(self.get_chat_history(), model, temperature, top_p, prompt_cache_key)
+        self.add_message("assistant", result)
+        return result
+    
+    async def agenerate_text(self, prompt: str, model: Optional[str] = None, 
+                             temperature: Optional[float] = None, top_p: Optional[float] = None) -> str:
+        """Async stateless generation - leaves chat history untouched, safe to run concurrently"""
+        return await self._acomplete([{"role": "user", "content": prompt}], model, temperature, top_p)
+    
+    async def abatch_chat(self, prompts: List[str], model: Optional[str] = None,
+                          max_in_flight: int = 50, qpm: Optional[float] = None) -> List[str]:
+        """
+        Run independent prompts concurrently and return responses in order
+        
+        Each prompt is a stateless query (see agenerate_text). At most max_in_flight
+        requests are outstanding at once; size it to the provider's rate tier.
+        If qpm is given, request starts are also spread to at most qpm per minute.
+        """
+        semaphore = asyncio.Semaphore(max_in_flight)
+        limiter = _RateLimiter(qpm) if qpm else None
+        
+        async def _one(prompt: str) -> str:
+            async with semaphore:
+                if limiter is not None:
+                    await limiter.acquire()
+                return await self.agenerate_text(prompt, model)
+        
+        return list(await asyncio.gather(*(_one(p) for p in prompts)))
+    
+    def batch_chat(self, prompts: List[str], model: Optional[str] = None,
+                   max_in_flight: int = 50, qpm: Optional[float] = None) -> List[str]:
+        """Sync wrapper around abatch_chat() (use abatch_chat inside an event loop)"""
+        return _run(self.abatch_chat(prompts, model, max_in_flight, qpm))
+    
     def simple_query(self, query: str, model: Optional[str] = None) -> str:
-        """Simple single query without preserving history"""
-        original_history = self.chat_history.copy()
-        self.clear_history()
+        """
+        Simple single query without preserving history
+        
+        Swaps in an empty history and restores the original one afterwards
+        (no copy). Not thread-safe: don't share one client across threads here.
+        """
+        saved = self._history, self.system_message
+        self._history = deque(maxlen=self.max_history)
         
         try:
             return self.generate_text(query, model)
         finally:
             # Restore original history
-            self.chat_history = original_history
+            self._history, self.system_message = saved
     
     def switch_provider(self, provider: str, api_key: Optional[str] = None):
-        """Switch to a different API provider"""
-        logger.info(f"🔄 Switching from {self.provider} to {provider}")
+        """Switch to a different API provider (no-op if nothing would change)"""
+        if provider == self.provider and not api_key:
+            return
+        logger.info("🔄 Switching from %s to %s", self.provider, provider)
         self.provider = provider
         self._init_client(api_key)
         # Keep chat history when switching providers
     
     def get_provider_info(self) -> Dict[str, Any]:
         """Get current provider information"""
+        cfg = self.config
         return {
             "provider": self.provider,
-            "model": self.config["model"],
-            "base_url": self.config["base_url"],
-            "temperature": self.config["temperature"],
-            "top_p": self.config["top_p"]
+            "model": cfg.model,
+            "base_url": cfg.base_url,
+            "temperature": cfg.temperature,
+            "top_p": cfg.top_p
         }
 
 
 class MockAIClient:
     """Mock client for testing without API calls"""
     
-    def __init__(self, provider: str = "mock", api_key: Optional[str] = None):
+    def __init__(self, provider: str = "mock", api_key: Optional[str] = None,
+                 max_history: int = 40):
         self.provider = provider
         self.api_key = api_key  # Not used in mock
-        self.chat_history: List[ChatMessage] = []
-        logger.info(f"🧪 MockAIClient initialized for testing (provider: {provider})")
+        if max_history < 1:
+            raise ValueError(f"max_history must be at least 1, got {max_history}")
+        self.max_history = max_history
+        self._history: Deque[Dict[str, str]] = deque(maxlen=max_history)
+        self.system_message: Optional[Dict[str, str]] = None
+        logger.info("🧪 MockAIClient initialized for testing (provider: %s)", provider)
     
     def add_message(self, role: str, content: str):
-        """Add message to chat history"""
-        message = ChatMessage(role, content)
-        self.chat_history.append(message)
+        """Add message to chat history (stored directly in OpenAI format)"""
+        message = {"role": _canonical_role(role), "content": content}
+        
+        # A system prompt opening the conversation is pinned; every later message, including
+        # further system messages, keeps its place and the deque's maxlen drops the oldest in O(1)
+        if message["role"] == "system" and self.system_message is None and not self._history:
+            self.system_message = message
+        else:
+            self._history.append(message)
     
     def get_chat_history(self) -> List[Dict[str, str]]:
-        """Get chat history in OpenAI format"""
-        return [msg.to_dict() for msg in self.chat_history]
+        """Get chat history in OpenAI format (pinned system prompt first, if set)"""
+        if self.system_message:
+            return [self.system_message, *self._history]
+        return list(self._history)
+    
+    @property
+    def chat_history(self) -> List[Dict[str, str]]:
+        """Chat history as a new list (same as get_chat_history())"""
+        return self.get_chat_history()
     
     def clear_history(self):
         """Clear chat history"""
-        self.chat_history = []
+        self._history.clear()
+        self.system_message = None
     
     @classmethod
-    def get_available_providers(cls) -> List[str]:
-        """Get list of available API providers"""
-        return ["mock"] + list(API_PROVIDERS.keys())
+    def get_available_providers(cls) -> Tuple[str, ...]:
+        """Get available API providers (shared immutable tuple)"""
+        return _mock_providers()
     
     def generate_text(self, prompt: str, model: Optional[str] = None, 
                      temperature: Optional[float] = None, top_p: Optional[float] = None) -> str:
         """Generate mock response"""
         # Simulate different responses based on prompt keywords
-        prompt_lower = prompt.lower()
-        
-        if any(word in prompt_lower for word in ['code', 'python', 'function', 'program']):
+        if _CODE_RE.search(prompt):
             return f"Mock coding response: Here's a simple Python function for your request about '{prompt[:30]}...'"
-        elif any(word in prompt_lower for word in ['math', 'calculate', 'equation', 'solve']):
+        elif _MATH_RE.search(prompt):
             return f"Mock math response: The solution to your mathematical query '{prompt[:30]}...' is calculated as follows."
         else:
             return f"Mock general response: This is a helpful response to your query about '{prompt[:30]}...'"
     
     def chat(self, user_message: str, model: Optional[str] = None, 
-             temperature: Optional[float] = None, top_p: Optional[float] = None) -> str:
-        """Mock chat with conversation history"""
+             temperature: Optional[float] = None, top_p: Optional[float] = None,
+             prompt_cache_key: Optional[str] = None) -> str:
+        """Mock chat with conversation history (prompt_cache_key is ignored)"""
         self.add_message("user", user_message)
         response = self.generate_text(user_message, model, temperature, top_p)
         self.add_message("assistant", response)
         return response
     
+    def stream_chat(self, user_message: str, model: Optional[str] = None, 
+                    temperature: Optional[float] = None, top_p: Optional[float] = None,
+                    prompt_cache_key: Optional[str] = None) -> Iterator[str]:
+        """Mock streaming chat - yields the response word by word"""
+        self.add_message("user", user_message)
+        response = self.generate_text(user_message, model, temperature, top_p)
+        for i, word in enumerate(response.split(" ")):
+            yield f" {word}" if i else word
+        self.add_message("assistant", response)
+    
+    async def astream_chat(self, user_message: str, model: Optional[str] = None, 
+                           temperature: Optional[float] = None, top_p: Optional[float] = None,
+                           prompt_cache_key: Optional[str] = None) -> AsyncIterator[str]:
+        """Mock async streaming chat"""
+        for part in self.stream_chat(user_message, model, temperature, top_p):
+            yield part
+    
+    async def achat(self, user_message: str, model: Optional[str] = None, 
+                    temperature: Optional[float] = None, top_p: Optional[float] = None,
+                    prompt_cache_key: Optional[str] = None) -> str:
+        """Mock async chat with conversation history"""
+        return self.chat(user_message, model, temperature, top_p)
+    
+    async def agenerate_text(self, prompt: str, model: Optional[str] = None, 
+                             temperature: Optional[float] = None, top_p: Optional[float] = None) -> str:
+        """Mock async stateless generation"""
+        return self.generate_text(prompt, model, temperature, top_p)
+    
+    async def abatch_chat(self, prompts: List[str], model: Optional[str] = None,
+                          max_in_flight: int = 50, qpm: Optional[float] = None) -> List[str]:
+        """Mock async batch of independent prompts"""
+        return self.batch_chat(prompts, model, max_in_flight, qpm)
+    
+    def batch_chat(self, prompts: List[str], model: Optional[str] = None,
+                   max_in_flight: int = 50, qpm: Optional[float] = None) -> List[str]:
+        """Mock batch of independent prompts (no limits to apply)"""
+        return [self.generate_text(p, model) for p in prompts]
+    
     def simple_query(self, query: str, model: Optional[str] = None) -> str:
         """Simple single query without preserving history"""
         return self.generate_text(query, model)
     
     def switch_provider(self, provider: str, api_key: Optional[str] = None):
         """Mock switch provider"""
-        logger.info(f"🧪 Mock switching from {self.provider} to {provider}")
+        if provider == self.provider and not api_key:
+            return
+        logger.info("🧪 Mock switching from %s to %s", self.provider, provider)
         self.provider = provider
     
     def get_provider_info(self) -> Dict[str, Any]:
@@ -258,6 +695,22 @@ class MockAIClient:
 if __name__ == "__main__":
     """Test multi-provider AI client functionality"""
     
+    # Allow tooling that executes this module to skip the demo entirely
+    if os.getenv("LLM_PY_PATTERNS_SKIP_DEMO"):
+        sys.exit(0)
+    
+    logging.basicConfig(level=logging.INFO)
+    
+    def smoke_test_providers():
+        """Check every configured provider (cached clients dedupe shared endpoints)"""
+        print(f"\n🔀 Testing Provider Switching:")
+        for provider in AIClient.get_available_providers():
+            try:
+                info = AIClient(provider).get_provider_info()
+                print(f"  ✅ {provider}: {info['model']} @ {info['base_url']}")
+            except Exception as e:
+                print(f"  ❌ {provider}: {str(e)[:60]}...")
+    
     print("🚀 Testing Multi-Provider AI Client")
     print("=" * 50)
     
@@ -326,14 +779,7 @@ if __name__ == "__main__":
         print(f"  {i}. {msg['role']}: {msg['content'][:60]}...")
     
     # Show provider switching capability
-    print(f"\n🔀 Testing Provider Switching:")
-    for provider in ["gemini", "gemini-pro", "openai", "openai-gpt3"]:
-        try:
-            test_client = AIClient(provider)
-            info = test_client.get_provider_info()
-            print(f"  ✅ {provider}: {info['model']} @ {info['base_url']}")
-        except Exception as e:
-            print(f"  ❌ {provider}: {str(e)[:60]}...")
+    smoke_test_providers()
     
     print(f"\n🎉 Multi-provider client testing completed!")
     
@@ -348,10 +794,12 @@ if __name__ == "__main__":
         can be encapsulated and reused as building blocks
         """
         
-        def __init__(self, name: str, internal_agents: List):
+        def __init__(self, name: str, internal_agents: List, client=None):
             self.name = name
             self.internal_agents = internal_agents
-            self.client = MockAIClient(f"subgraph-{name}")
+            # Injected client is shared across subgraphs (one connection pool);
+            # routing decides behavior, not client identity
+            self.client = client or MockAIClient(f"subgraph-{name}")
         
         def process(self, request: str) -> Dict[str, Any]:
             """Process request through internal agent chain"""
@@ -367,6 +815,20 @@ if __name__ == "__main__":
                 "agents_used": self.internal_agents,
                 "response": response
             }
+        
+        async def aprocess(self, request: str) -> Dict[str, Any]:
+            """Async variant of process() so many requests can be in flight at once"""
+            print(f"    🔸 SubGraph '{self.name}' processing...")
+            
+            for agent in self.internal_agents:
+                print(f"      → {agent} analyzing...")
+            
+            response = await self.client.agenerate_text(request)
+            return {
+                "subgraph": self.name,
+                "agents_used": self.internal_agents,
+                "response": response
+            }
     
     class MainGraphOrchestrator:
         """
@@ -374,32 +836,49 @@ if __name__ == "__main__":
         Similar to LangGraph's main workflow with embedded subgraphs
         """
         
-        def __init__(self):
+        def __init__(self, client=None):
+            # One client shared by every subgraph (pass an AIClient for real APIs)
+            shared = client or MockAIClient("orchestrator")
+            
             # Create specialized subgraphs
             self.subgraphs = {
                 "technical": SubGraphHandler("TechnicalSupport", 
-                    ["CodeAgent", "DebugAgent", "ArchitectureAgent"]),
+                    ["CodeAgent", "DebugAgent", "ArchitectureAgent"], shared),
                 "business": SubGraphHandler("BusinessLogic", 
-                    ["MathAgent", "DataAgent", "ReportAgent"]),
+                    ["MathAgent", "DataAgent", "ReportAgent"], shared),
                 "general": SubGraphHandler("GeneralSupport", 
-                    ["ChatAgent", "InfoAgent", "HelpAgent"])
+                    ["ChatAgent", "InfoAgent", "HelpAgent"], shared)
             }
         
-        def route_request(self, request: str) -> str:
-            """Route request to appropriate subgraph (like LangGraph routing)"""
-            request_lower = request.lower()
-            
-            if any(word in request_lower for word in ['code', 'bug', 'debug', 'technical']):
+        def _choose_subgraph(self, request: str) -> str:
+            """Pick the subgraph for a request"""
+            if _TECH_RE.search(request):
                 chosen_subgraph = "technical"
-            elif any(word in request_lower for word in ['calculate', 'data', 'business', 'report']):
+            elif _BIZ_RE.search(request):
                 chosen_subgraph = "business"
             else:
                 chosen_subgraph = "general"
             
             print(f"  🎯 Routing to '{chosen_subgraph}' subgraph")
-            result = self.subgraphs[chosen_subgraph].process(request)
+            return chosen_subgraph
+        
+        def route_request(self, request: str) -> str:
+            """Route request to appropriate subgraph (like LangGraph routing)"""
+            result = self.subgraphs[self._choose_subgraph(request)].process(request)
             
             return f"Processed by {result['subgraph']}: {result['response']}"
+        
+        def route_requests(self, requests: List[str]) -> List[str]:
+            """Route a batch of requests, processing all subgraph calls concurrently"""
+            async def _gather():
+                return await asyncio.gather(*(
+                    self.subgraphs[self._choose_subgraph(request)].aprocess(request)
+                    for request in requests
+                ))
+            
+            # Shared runner, like batch_chat: an AIClient's per-loop async clients are reused, not stranded
+            results = _run(_gather())
+            return [f"Processed by {r['subgraph']}: {r['response']}" for r in results]
     
     # Demo SubGraph workflow
     print(f"\n🚀 Creating LangGraph-style Main Graph with SubGraphs:")
@@ -418,6 +897,11 @@ if __name__ == "__main__":
         result = main_graph.route_request(test_case)
         print(f"✅ Result: {result[:80]}...")
     
+    # Same requests as one concurrent batch
+    print(f"\n⚡ Batch routing {len(subgraph_test_cases)} requests concurrently:")
+    for test_case, result in zip(subgraph_test_cases, main_graph.route_requests(subgraph_test_cases)):
+        print(f"  ✅ {test_case[:30]}... -> {result[:50]}...")
+    
     print(f"\n🎯 SubGraph Benefits (LangGraph Pattern):")
     print(f"  🔹 Modularity: Each subgraph is self-contained")
     print(f"  🔹 Reusability: Subgraphs can be used in multiple workflows") 
@@ -430,4 +914,6 @@ if __name__ == "__main__":
     print(f"  - Use AIClient('openai') for OpenAI API") 
     print(f"  - Use MockAIClient() for testing without API calls")
     print(f"  - Add API keys to .env file for real API testing")
-    print(f"  - SubGraphs enable LangGraph-style complex workflows! 🎉")
\ No newline at end of file
+    print(f"  - SubGraphs enable LangGraph-style complex workflows! 🎉")
+    
+    AIClient.close_all()
\ No newline at end of file
@@ -10,24 +10,36 @@ Real applications: file operations, database connections, temporary configuratio
 import time
 from contextlib import contextmanager
 
-@contextmanager
-def simple_timer(task_name):
+class SimpleTimer:
     """Simplest timer Context Manager"""
-    print(f"⏰ Starting: {task_name}")
-    start = time.time()
-    try:
-        yield start  # setup before yield, cleanup after
-    finally:
-        print(f"✅ Completed: {task_name} ({time.time() - start:.2f}s)")
+    __slots__ = ("task_name", "start")
+    
+    def __init__(self, task_name):
+        self.task_name = task_name
+        self.start = None
+    
+    def __enter__(self):
+        print(f"⏰ Starting: {self.task_name}")
+        # One monotonic clock for both the returned start and the measurement
+        self.start = time.perf_counter_ns()
+        return self.start  # __enter__ is setup, __exit__ is cleanup
+    
+    def __exit__(self, exc_type, exc, tb):
+        print(f"✅ Completed: {self.task_name} ({(time.perf_counter_ns() - self.start) / 1e9:.2f}s)")
+        return False  # Don't swallow exceptions
 
-@contextmanager  
+def simple_timer(task_name):
+    """Time a block: `with simple_timer(name) as start:` (function-style name for SimpleTimer)"""
+    return SimpleTimer(task_name)
+
+@contextmanager
 def temp_config(config, key, value):
     """Temporarily modify config, auto-restore on exit"""
     original = config.get(key)
     config[key] = value
     print(f"🔄 Temp setting {key}={value}")
     try:
-        yield config
+        yield config  # setup before yield, cleanup after
     finally:
         config[key] = original
         print(f"🔄 Restored {key}={original}")
@@ -38,7 +50,7 @@ if __name__ == "__main__":
     # 1. Basic timer
     with simple_timer("data processing") as start:
         time.sleep(0.1)
-        print(f"   Start time: {start:.2f}")
+        print(f"   Start (perf_counter_ns): {start}")
     
     # 2. Temporary config
     config = {"debug": False}
@@ -47,4 +59,4 @@ if __name__ == "__main__":
         print(f"Temp config: {config}")
     print(f"Restored config: {config}")
     
-    print("\n✅ Key Point: yield separates setup/cleanup, finally ensures cleanup execution")
\ No newline at end of file
+    print("\n✅ Key Point: __enter__/__exit__ (class) or yield + finally (@contextmanager) split setup from cleanup, which runs even on exceptions")
\ No newline at end of file
@@ -9,32 +9,77 @@ Using Context Manager to manage LLM session lifecycle, including:
 Real applications: chatbots, batch processing, cost monitoring
 """
 
-from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
 
-@contextmanager
-def llm_session(session_id, max_tokens=100):
-    """LLM Session Manager"""
-    print(f"🚀 Starting session: {session_id}")
-    session = {"id": session_id, "messages": [], "tokens": 0, "max_tokens": max_tokens}
+try:
+    import tiktoken
+except ImportError:  # Optional: without tiktoken, fall back to the rough len // 4 estimate
+    tiktoken = None
+
+@lru_cache(maxsize=8)
+def _encoder(model):
+    """Cached tiktoken encoder per model (None if tiktoken is missing or can't load one)"""
+    if tiktoken is None:
+        return None
     try:
-        yield session
-        print(f"✅ Session completed: {session['id']}")
-    except Exception as e:
-        print(f"❌ Session error: {e}")
-        raise
-    finally:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        # Unknown model, or the BPE file can't be downloaded (offline): estimate instead;
+        # returning None also caches the failure, so it isn't retried on every call
+        return None
+
+def count_tokens(content, model="gpt-4"):
+    """Count tokens in content (real BPE when available)"""
+    enc = _encoder(model)
+    return len(enc.encode(content)) if enc else len(content) // 4
+
+@dataclass(slots=True)
+class Session:
+    """Session state: slotted, attribute access instead of dict keys"""
+    id: str
+    max_tokens: int = 100
+    model: str = "gpt-4"
+    tokens: int = 0
+    messages: list = field(default_factory=list)
+
+class LLMSession:
+    """LLM Session Manager"""
+    __slots__ = ("session_id", "max_tokens", "session")
+    
+    def __init__(self, session_id, max_tokens=100):
+        self.session_id = session_id
+        self.max_tokens = max_tokens
+        self.session = None
+    
+    def __enter__(self):
+        print(f"🚀 Starting session: {self.session_id}")
+        self.session = Session(self.session_id, self.max_tokens)
+        return self.session
+    
+    def __exit__(self, exc_type, exc, tb):
+        s = self.session
+        if exc_type is None:
+            print(f"✅ Session completed: {s.id}")
+        elif issubclass(exc_type, Exception):
+            print(f"❌ Session error: {exc}")
         # Session statistics and cleanup
-        cost = session["tokens"] * 0.002 / 1000
-        print(f"📊 Stats: {len(session['messages'])} messages, {session['tokens']} tokens, ${cost:.4f}")
+        cost = s.tokens * 0.002 / 1000
+        print(f"📊 Stats: {len(s.messages)} messages, {s.tokens} tokens, ${cost:.4f}")
+        return False
+
+def llm_session(session_id, max_tokens=100):
+    """Open a token-budgeted chat session (function-style name for LLMSession)"""
+    return LLMSession(session_id, max_tokens)
 
 def add_message(session, role, content):
     """Add message to session"""
-    tokens = len(content) // 4  # Simple token estimation
-    session["messages"].append({"role": role, "content": content})
-    session["tokens"] += tokens
+    tokens = count_tokens(content, session.model)
+    session.messages.append({"role": role, "content": content})
+    session.tokens += tokens
     
-    if session["tokens"] > session["max_tokens"]:
-        print(f"⚠️ Token limit exceeded: {session['tokens']}/{session['max_tokens']}")
+    if session.tokens > session.max_tokens:
+        print(f"⚠️ Token limit exceeded: {session.tokens}/{session.max_tokens}")
     
     print(f"💬 {role}: {content[:30]}... ({tokens} tokens)")
 
@@ -10,18 +10,23 @@ Core: @asynccontextmanager decorator and async with statements
 """
 
 import asyncio
+import os
 from contextlib import asynccontextmanager
 
+# Scale for the simulated latencies below; WORKSHOP_LATENCY_SCALE=0 keeps the await
+# points (sleep(0) still yields) but drops the waiting, leaving only the CM overhead
+SIMULATED_LATENCY_SCALE = float(os.environ.get("WORKSHOP_LATENCY_SCALE", "1"))
+
 @asynccontextmanager
 async def gpu_resource(gpu_id):
     """GPU Resource Manager"""
     print(f"🔧 Allocating GPU-{gpu_id}")
-    await asyncio.sleep(0.1)  # Simulate async resource allocation
+    await asyncio.sleep(0.1 * SIMULATED_LATENCY_SCALE)  # Simulate async resource allocation
     try:
         yield f"GPU-{gpu_id}"
     finally:
         print(f"🔧 Releasing GPU-{gpu_id}")
-        await asyncio.sleep(0.05)  # Simulate async cleanup
+        await asyncio.sleep(0.05 * SIMULATED_LATENCY_SCALE)  # Simulate async cleanup
 
 @asynccontextmanager
 async def async_llm_session(session_id):
@@ -38,7 +43,7 @@ async def process_llm_query(session, query):
     """Simulate async LLM query processing"""
     session["tasks"].append(query)
     print(f"   🔄 Processing: {query}")
-    await asyncio.sleep(0.1)  # Simulate async processing time
+    await asyncio.sleep(0.1 * SIMULATED_LATENCY_SCALE)  # Simulate async processing time
     return f"Response: {query}"
 
 async def main():
@@ -47,7 +52,7 @@ async def main():
     # 1. GPU resource management
     async with gpu_resource("A100") as gpu:
         print(f"   Using {gpu} for computation")
-        await asyncio.sleep(0.05)
+        await asyncio.sleep(0.05 * SIMULATED_LATENCY_SCALE)
     
     # 2. Async session processing
     async with async_llm_session("async-chat") as session:
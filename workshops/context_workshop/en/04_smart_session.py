@@ -11,36 +11,92 @@ Features:
 """
 
 import contextvars
-from contextlib import contextmanager
+import json
+from dataclasses import dataclass
+from typing import Optional
 
-# Global context variables
-current_session = contextvars.ContextVar('current_session', default=None)
-current_model = contextvars.ContextVar('current_model', default='gpt-3.5-turbo')
+@dataclass(frozen=True, slots=True)
+class SessionState:
+    """Current session and model, bundled so each nesting level is one set/reset"""
+    session: Optional[dict] = None
+    model: str = "gpt-3.5-turbo"
 
-@contextmanager
-def smart_session(session_id, model="gpt-4"):
-    """Smart session manager - auto-set global context"""
-    print(f"🧠 Smart session: {session_id}")
-    session = {"id": session_id, "calls": [], "model": model}
+# One context variable holding the whole session state
+current_state = contextvars.ContextVar('current_state', default=SessionState())
+
+class SmartSession:
+    """
+    Smart session manager - auto-set global context
+    
+    With batch=True, calls are queued and submitted together on exit -
+    for latency-tolerant work (overnight jobs, offline analytics). submit_batch
+    receives the Batch API JSONL lines and returns responses by custom_id
+    (defaults to a local mock).
+    """
+    __slots__ = ("session_id", "model", "batch", "submit_batch", "session", "token")
+    
+    def __init__(self, session_id, model="gpt-4", batch=False, submit_batch=None):
+        self.session_id = session_id
+        self.model = model
+        self.batch = batch
+        self.submit_batch = submit_batch or _mock_submit_batch
+        self.session = None
+        self.token = None
     
-    # Set context variables
-    session_token = current_session.set(session)
-    model_token = current_model.set(model)
+    def __enter__(self):
+        print(f"🧠 Smart session: {self.session_id}")
+        self.session = {"id": self.session_id, "calls": [], "model": self.model, "batch": self.batch}
+        # Set context variables
+        self.token = current_state.set(SessionState(self.session, self.model))
+        return self.session
     
-    try:
-        yield session
-    finally:
-        # Restore context variables
-        current_session.reset(session_token)
-        current_model.reset(model_token)
-        print(f"📝 Auto-recorded {len(session['calls'])} calls")
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None and self.batch and self.session["calls"]:
+                _submit_batch(self.session, self.submit_batch)
+        finally:
+            # Restore context variables
+            current_state.reset(self.token)
+            print(f"📝 Auto-recorded {len(self.session['calls'])} calls")
+        return False
+
+def _mock_submit_batch(lines):
+    """Stand-in for the Batch API: answer each JSONL request line, keyed by custom_id"""
+    # Real API: upload via client.files.create(purpose="batch"), then
+    # client.batches.create(input_file_id=..., endpoint="/v1/chat/completions", completion_window="24h"),
+    # poll until complete and map each result back by custom_id
+    results = {}
+    for line in lines:
+        request = json.loads(line)
+        results[request["custom_id"]] = f"AI response: {request['body']['messages'][0]['content']}"
+    return results
+
+def _submit_batch(session, submit):
+    """Serialize queued calls as Batch API JSONL lines and fan results back"""
+    lines = [
+        json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": call["model"], "messages": [{"role": "user", "content": call["prompt"]}]}
+        })
+        for i, call in enumerate(session["calls"])
+    ]
+    results = submit(lines)
+    for i, call in enumerate(session["calls"]):
+        call["response"] = results[str(i)]
+    print(f"📦 Batch submitted: {len(lines)} calls in one request")
 
 def smart_llm_call(prompt):
     """Smart LLM call - auto-detect current session"""
-    session = current_session.get()
-    model = current_model.get()
+    state = current_state.get()
+    session, model = state.session, state.model
     
-    if session:
+    if session and session["batch"]:
+        session["calls"].append({"prompt": prompt, "model": model, "response": None})
+        print(f"🤖 [{model}] {prompt[:20]}... (queued for batch)")
+        return None
+    elif session:
         session["calls"].append({"prompt": prompt, "model": model})
         print(f"🤖 [{model}] {prompt[:20]}... (recorded)")
     else:
@@ -52,7 +108,7 @@ if __name__ == "__main__":
     print("🧠 Smart Session Manager Demo\n")
     
     # 1. Smart session - auto recording
-    with smart_session("auto-chat", "gpt-4") as session:
+    with SmartSession("auto-chat", "gpt-4") as session:
         smart_llm_call("What is contextvars?")
         smart_llm_call("How to apply in LLM?")
         smart_llm_call("Any real use cases?")
@@ -61,10 +117,16 @@ if __name__ == "__main__":
     smart_llm_call("This call won't be recorded")
     
     # 3. Nested sessions
-    with smart_session("outer-session"):
+    with SmartSession("outer-session"):
         smart_llm_call("Outer session")
-        with smart_session("inner-session"):
+        with SmartSession("inner-session"):
             smart_llm_call("Inner session")
         smart_llm_call("Back to outer")
     
+    # 4. Batch session - calls are submitted together on exit
+    with SmartSession("nightly-report", batch=True) as session:
+        smart_llm_call("Summarize today's logs")
+        smart_llm_call("List anomalies")
+    print(f"   First batched response: {session['calls'][0]['response']}")
+    
     print("\n✅ Key Point: contextvars enables global state awareness, internal functions auto-get context")
\ No newline at end of file
@@ -6,62 +6,111 @@ Demonstrate how to compose multiple Context Managers for complex resource manage
 - Multi-layer nested resource dependencies
 - Enterprise-grade comprehensive management
 
-Core: Nested usage of multiple with statements
+Core: Nested usage of multiple with statements, flattened onto one ExitStack
 """
 
-from contextlib import contextmanager
 import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 
-@contextmanager
-def budget_tracker(budget):
+@dataclass(slots=True)
+class Budget:
+    """Budget state"""
+    budget: float
+    spent: float = 0
+
+@dataclass(slots=True)
+class Session:
+    """Batch session state"""
+    id: str
+    operations: list = field(default_factory=list)
+
+class BudgetTracker:
     """Budget Tracker Manager"""
-    print(f"💰 Budget control: ${budget}")
-    tracker = {"budget": budget, "spent": 0}
-    try:
-        yield tracker
-    finally:
-        remaining = tracker["budget"] - tracker["spent"]
-        print(f"💰 Budget summary: spent ${tracker['spent']:.3f}, remaining ${remaining:.3f}")
+    __slots__ = ("budget", "tracker")
+    
+    def __init__(self, budget):
+        self.budget = budget
+        self.tracker = None
+    
+    def __enter__(self):
+        print(f"💰 Budget control: ${self.budget}")
+        self.tracker = Budget(self.budget)
+        return self.tracker
+    
+    def __exit__(self, exc_type, exc, tb):
+        t = self.tracker
+        remaining = t.budget - t.spent
+        print(f"💰 Budget summary: spent ${t.spent:.3f}, remaining ${remaining:.3f}")
+        return False
 
-@contextmanager
-def performance_monitor(task_name):
+def budget_tracker(budget):
+    """Track spending against a budget (function-style name for BudgetTracker)"""
+    return BudgetTracker(budget)
+
+class PerformanceMonitor:
     """Performance Monitor Manager"""
-    print(f"📊 Performance monitoring: {task_name}")
-    start = time.time()
-    try:
-        yield {"task": task_name, "start_time": start}
-    finally:
-        duration = time.time() - start
-        print(f"📊 Performance report: {task_name} took {duration:.2f}s")
+    __slots__ = ("task_name", "start")
+    
+    def __init__(self, task_name):
+        self.task_name = task_name
+        self.start = None
+    
+    def __enter__(self):
+        print(f"📊 Performance monitoring: {self.task_name}")
+        self.start = time.perf_counter_ns()
+        return {"task": self.task_name, "start_time": time.time()}
+    
+    def __exit__(self, exc_type, exc, tb):
+        duration = (time.perf_counter_ns() - self.start) / 1e9
+        print(f"📊 Performance report: {self.task_name} took {duration:.2f}s")
+        return False
 
-@contextmanager
-def simple_session(session_id):
+def performance_monitor(task_name):
+    """Report how long the block took (function-style name for PerformanceMonitor)"""
+    return PerformanceMonitor(task_name)
+
+class SimpleSession:
     """Simplified Session Manager"""
-    print(f"🚀 Session: {session_id}")
-    session = {"id": session_id, "operations": []}
-    try:
-        yield session
-    finally:
-        print(f"🚀 Session ended: {session_id} ({len(session['operations'])} operations)")
+    __slots__ = ("session_id", "session")
+    
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.session = None
+    
+    def __enter__(self):
+        print(f"🚀 Session: {self.session_id}")
+        self.session = Session(self.session_id)
+        return self.session
+    
+    def __exit__(self, exc_type, exc, tb):
+        print(f"🚀 Session ended: {self.session_id} ({len(self.session.operations)} operations)")
+        return False
+
+def simple_session(session_id):
+    """Record the operations of one batch session (function-style name for SimpleSession)"""
+    return SimpleSession(session_id)
 
 def simulate_llm_call(session, budget, operation):
     """Simulate LLM call"""
     cost = 0.01  # Cost per call
-    session["operations"].append(operation)
-    budget["spent"] += cost
+    session.operations.append(operation)
+    budget.spent += cost
     print(f"   🤖 Executing: {operation} (Cost: ${cost})")
 
 if __name__ == "__main__":
     print("🔄 Nested Composite Context Manager Demo\n")
     
-    # Three-layer nesting: budget + monitoring + session
-    with budget_tracker(0.05) as budget:
-        with performance_monitor("AI batch processing") as monitor:
-            with simple_session("batch-001") as session:
-                simulate_llm_call(session, budget, "data analysis")
-                simulate_llm_call(session, budget, "report generation")
-                simulate_llm_call(session, budget, "result validation")
-                
-                print(f"   📈 Current spending: ${budget['spent']:.3f}")
+    # Three layers: budget + monitoring + session on one ExitStack
+    # (same LIFO teardown as nested with blocks, but the list of managers can be built at runtime)
+    with ExitStack() as stack:
+        budget = stack.enter_context(budget_tracker(0.05))
+        monitor = stack.enter_context(performance_monitor("AI batch processing"))
+        session = stack.enter_context(simple_session("batch-001"))
+        simulate_llm_call(session, budget, "data analysis")
+        simulate_llm_call(session, budget, "report generation")
+        simulate_llm_call(session, budget, "result validation")
+        
+        print(f"   📈 Current spending: ${budget.spent:.3f}")
     
     print("\n✅ Key Point: Nested Context Manager enables multi-layer resource management and monitoring")
\ No newline at end of file
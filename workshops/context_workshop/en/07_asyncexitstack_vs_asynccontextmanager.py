@@ -5,54 +5,102 @@ Relationship between AsyncExitStack and @asynccontextmanager:
 - @asynccontextmanager: Creates a single async context manager
 - AsyncExitStack: Manages combinations of multiple async context managers
 
-Actual relationship: AsyncExitStack internally uses multiple objects created by @asynccontextmanager
+Actual relationship: AsyncExitStack manages any async context manager - class-based
+ones (__aenter__/__aexit__) like the resources below, or generator-based ones
+built with @asynccontextmanager like application_context()
 """
 
 import asyncio
-from contextlib import asynccontextmanager, AsyncExitStack
+import json
+import os
+import sys
+import time
+from contextlib import asynccontextmanager, contextmanager, AsyncExitStack
+from dataclasses import dataclass
+from typing import Any
+
+# Per-phase timings for profiling: WORKSHOP_TIMINGS=1 prints one JSON line per demo
+# phase to stderr, so the stdout demo output stays unchanged
+TIMINGS_ENABLED = bool(os.environ.get("WORKSHOP_TIMINGS"))
+
+@contextmanager
+def timed(label):
+    """Time the enclosed block and report it as JSON on stderr (when enabled)"""
+    if not TIMINGS_ENABLED:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        elapsed_ns = time.perf_counter_ns() - start
+        print(json.dumps({"phase": label, "ns": elapsed_ns}), file=sys.stderr)
 
 # =============================================================================
-# 1. Single Resource Manager - @asynccontextmanager
+# 1. Single Resource Manager - class-based async context manager
+#    (@asynccontextmanager is the generator shorthand for the same protocol)
 # =============================================================================
 
-@asynccontextmanager
-async def database_connection(db_name):
+class DatabaseConnection:
     """Single database connection manager"""
-    print(f"🔌 Connecting to database: {db_name}")
-    await asyncio.sleep(0.1)  # Simulate connection time
-    connection = f"DB_{db_name}_connection"
-    try:
-        yield connection
-    finally:
-        print(f"🔌 Closing database: {db_name}")
+    __slots__ = ("db_name",)
+    
+    def __init__(self, db_name):
+        self.db_name = db_name
+    
+    async def __aenter__(self):
+        print(f"🔌 Connecting to database: {self.db_name}")
+        await asyncio.sleep(0.1)  # Simulate connection time
+        return f"DB_{self.db_name}_connection"
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        print(f"🔌 Closing database: {self.db_name}")
         await asyncio.sleep(0.05)  # Simulate closing time
+        return False
 
-@asynccontextmanager
-async def redis_cache(cache_name):
+class RedisCache:
     """Single Redis cache manager"""
-    print(f"⚡ Connecting to cache: {cache_name}")
-    await asyncio.sleep(0.1)
-    cache = f"CACHE_{cache_name}_connection"
-    try:
-        yield cache
-    finally:
-        print(f"⚡ Closing cache: {cache_name}")
+    __slots__ = ("cache_name",)
+    
+    def __init__(self, cache_name):
+        self.cache_name = cache_name
+    
+    async def __aenter__(self):
+        print(f"⚡ Connecting to cache: {self.cache_name}")
+        await asyncio.sleep(0.1)
+        return f"CACHE_{self.cache_name}_connection"
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        print(f"⚡ Closing cache: {self.cache_name}")
         await asyncio.sleep(0.05)
+        return False
 
-@asynccontextmanager
-async def message_queue(queue_name):
+class MessageQueue:
     """Single message queue manager"""
-    print(f"📬 Connecting to queue: {queue_name}")
-    await asyncio.sleep(0.1)
-    queue = f"QUEUE_{queue_name}_connection"
-    try:
-        yield queue
-    finally:
-        print(f"📬 Closing queue: {queue_name}")
+    __slots__ = ("queue_name",)
+    
+    def __init__(self, queue_name):
+        self.queue_name = queue_name
+    
+    async def __aenter__(self):
+        print(f"📬 Connecting to queue: {self.queue_name}")
+        await asyncio.sleep(0.1)
+        return f"QUEUE_{self.queue_name}_connection"
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        print(f"📬 Closing queue: {self.queue_name}")
         await asyncio.sleep(0.05)
+        return False
+
+# Resource type -> manager factory, built once for dynamic dispatch
+RESOURCE_FACTORIES = {
+    "database": DatabaseConnection,
+    "cache": RedisCache,
+    "queue": MessageQueue
+}
 
 # =============================================================================
-# 2. Traditional Nested Approach - Multiple @asynccontextmanager
+# 2. Traditional Nested Approach - Multiple async context managers
 # =============================================================================
 
 async def traditional_nested_approach():
@@ -60,9 +108,9 @@ async def traditional_nested_approach():
     print("📍 Traditional nested approach:")
     print("-" * 30)
     
-    async with database_connection("users") as db:
-        async with redis_cache("session") as cache:
-            async with message_queue("notifications") as queue:
+    async with DatabaseConnection("users") as db:
+        async with RedisCache("session") as cache:
+            async with MessageQueue("notifications") as queue:
                 print(f"✅ Using resources: {db}, {cache}, {queue}")
                 await asyncio.sleep(0.1)  # Simulate work
     print()
@@ -71,17 +119,36 @@ async def traditional_nested_approach():
 # 3. AsyncExitStack Approach - Dynamic Management of Multiple Resources
 # =============================================================================
 
+async def enter_all(stack, *managers):
+    """
+    Enter independent async context managers concurrently on one stack
+    
+    Setup waits overlap instead of adding up. All entries settle before any error
+    is raised, so every manager that did enter has its exit registered and is
+    cleaned up. Exits run in reverse order of completion, not argument order.
+    """
+    results = await asyncio.gather(
+        *(stack.enter_async_context(cm) for cm in managers), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
 async def async_exit_stack_approach():
     """AsyncExitStack dynamically manages multiple resources"""
     print("📍 AsyncExitStack approach:")
     print("-" * 30)
     
     async with AsyncExitStack() as stack:
-       # Dynamically add multiple async context managers
-        db = await stack.enter_async_context(database_connection("users"))
-        cache = await stack.enter_async_context(redis_cache("session"))
-        queue = await stack.enter_async_context(message_queue("notifications"))
-         
+        # Acquire all three concurrently: ~0.1s of setup instead of ~0.3s
+        db, cache, queue = await enter_all(
+            stack,
+            DatabaseConnection("users"),
+            RedisCache("session"),
+            MessageQueue("notifications")
+        )
+        
         print(f"✅ Using resources: {db}, {cache}, {queue}")
         await asyncio.sleep(0.1)  # Simulate work
     print()
@@ -96,8 +163,6 @@ async def dynamic_resource_management():
     print("-" * 30)
     
     async with AsyncExitStack() as stack:
-        resources = []
-        
         # Dynamically add resources based on conditions
         configs = [
             ("primary_db", "database"),
@@ -105,15 +170,11 @@ async def dynamic_resource_management():
             ("email_queue", "queue")
         ]
         
-        for name, resource_type in configs:
-            if resource_type == "database":
-                resource = await stack.enter_async_context(database_connection(name))
-            elif resource_type == "cache":
-                resource = await stack.enter_async_context(redis_cache(name))
-            elif resource_type == "queue":
-                resource = await stack.enter_async_context(message_queue(name))
-            
-            resources.append(resource)
+        # Build every manager first, then enter them all concurrently
+        resources = await enter_all(
+            stack, *(RESOURCE_FACTORIES[resource_type](name) for name, resource_type in configs)
+        )
+        for resource in resources:
             print(f"   ➕ Dynamically added: {resource}")
         
         print(f"✅ Managing {len(resources)} dynamic resources")
@@ -121,34 +182,48 @@ async def dynamic_resource_management():
     print()
 
 # =============================================================================
-# 5. Combined Usage - AsyncExitStack Managing Custom @asynccontextmanager
+# 5. Combined Usage - AsyncExitStack Managing a Custom @asynccontextmanager
 # =============================================================================
 
+@dataclass(slots=True)
+class AppContext:
+    """Application resources handed to the caller"""
+    name: str
+    database: Any
+    cache: Any
+    message_queue: Any
+    startup_time: float
+
+async def start_application(stack, app_name):
+    """Register an application's resources on the caller's stack and return its context"""
+    print(f"🚀 Starting application: {app_name}")
+    loop = asyncio.get_running_loop()
+    
+    # All resources needed by the application, acquired concurrently
+    db, cache, queue = await enter_all(
+        stack,
+        DatabaseConnection("app_db"),
+        RedisCache("app_cache"),
+        MessageQueue("app_queue")
+    )
+    
+    # Create application context
+    app_context = AppContext(app_name, db, cache, queue, loop.time())
+    
+    def report_uptime():
+        uptime = loop.time() - app_context.startup_time
+        print(f"🚀 Application {app_name} ran for {uptime:.2f} seconds")
+    
+    # Uptime report registered last, so it runs before the resources close
+    stack.callback(report_uptime)
+    return app_context
+
 @asynccontextmanager
 async def application_context(app_name):
     """Application-level context manager - internally uses AsyncExitStack"""
-    print(f"🚀 Starting application: {app_name}")
-    
+    # Standalone use: a private stack owned by this context manager
     async with AsyncExitStack() as stack:
-        # All resources needed by the application
-        db = await stack.enter_async_context(database_connection("app_db"))
-        cache = await stack.enter_async_context(redis_cache("app_cache"))
-        queue = await stack.enter_async_context(message_queue("app_queue"))
-        
-        # Create application context
-        app_context = {
-            "name": app_name,
-            "database": db,
-            "cache": cache,
-            "message_queue": queue,
-            "startup_time": asyncio.get_event_loop().time()
-        }
-        
-        try:
-            yield app_context
-        finally:
-            uptime = asyncio.get_event_loop().time() - app_context["startup_time"]
-            print(f"🚀 Application {app_name} ran for {uptime:.2f} seconds")
+        yield await start_application(stack, app_name)
 
 async def combined_approach():
     """Combined usage of both approaches"""
@@ -157,11 +232,14 @@ async def combined_approach():
     
     # Outer layer uses AsyncExitStack to manage multiple applications
     async with AsyncExitStack() as stack:
-        # Each application internally uses @asynccontextmanager + AsyncExitStack
+        # An @asynccontextmanager is entered like any other async context manager
+        # (it runs its own inner stack)
         app1 = await stack.enter_async_context(application_context("WebServer"))
-        app2 = await stack.enter_async_context(application_context("APIGateway"))
+        # Or register an application's resources directly on this one stack,
+        # skipping the inner stack and generator
+        app2 = await start_application(stack, "APIGateway")
         
-        print(f"✅ Running applications: {app1['name']} and {app2['name']}")
+        print(f"✅ Running applications: {app1.name} and {app2.name}")
         await asyncio.sleep(0.2)
     print()
 
@@ -177,8 +255,8 @@ async def error_handling_comparison():
     # AsyncExitStack error handling
     try:
         async with AsyncExitStack() as stack:
-            db = await stack.enter_async_context(database_connection("test_db"))
-            cache = await stack.enter_async_context(redis_cache("test_cache"))
+            db = await stack.enter_async_context(DatabaseConnection("test_db"))
+            cache = await stack.enter_async_context(RedisCache("test_cache"))
             
             print("⚠️ Simulating error...")
             raise ValueError("Test error")
@@ -197,16 +275,21 @@ async def main():
     print("🔧 AsyncExitStack vs @asynccontextmanager ComparisonDemo")
     print("=" * 60)
     
-    await traditional_nested_approach()
-    await async_exit_stack_approach()
-    await dynamic_resource_management()
-    await combined_approach()
-    await error_handling_comparison()
+    with timed("traditional_nested"):
+        await traditional_nested_approach()
+    with timed("async_exit_stack"):
+        await async_exit_stack_approach()
+    with timed("dynamic_resources"):
+        await dynamic_resource_management()
+    with timed("combined"):
+        await combined_approach()
+    with timed("error_handling"):
+        await error_handling_comparison()
     
     print("📚 Key differences summary:")
     print("✅ @asynccontextmanager: Creates single async context manager")
     print("✅ AsyncExitStack: Manages multiple async context managers")
-    print("✅ Relationship: AsyncExitStack uses objects created by @asynccontextmanager")
+    print("✅ Relationship: AsyncExitStack manages any async context manager, class-based or @asynccontextmanager")
     print("✅ Advantage: AsyncExitStack supports dynamic addition and complex resource management")
 
 if __name__ == "__main__":
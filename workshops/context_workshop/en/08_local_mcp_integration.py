@@ -16,48 +16,333 @@ Context Manager solution:
 """
 
 import asyncio
+import logging
+import math
+import os
+import sys
+import time
+import weakref
 from contextlib import AsyncExitStack, asynccontextmanager
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import uvloop
+except ImportError:  # Optional: faster event loop when installed, stdlib loop otherwise
+    uvloop = None
+
+# Scale for the simulated latencies below; MCP_DEMO_LATENCY_SCALE=0 keeps the
+# await points (sleep(0) still yields) but drops the waiting, for timing the CM stack itself
+SIMULATED_LATENCY_SCALE = float(os.environ.get("MCP_DEMO_LATENCY_SCALE", "1"))
+
+# Load-test mode (MCP_DEMO_BATCH_WAKEUPS=1, off by default): concurrent simulated waits
+# on one event loop that end in the same millisecond share one timer and one future, so
+# N overlapping mock calls cost one timer-heap entry, not N (deadlines round up to 1 ms).
+# Off, every simulated wait is a plain asyncio.sleep(delay).
+_BATCH_MODE = bool(os.environ.get("MCP_DEMO_BATCH_WAKEUPS"))
+
+# Wakeups are kept per loop: futures belong to the loop that created them, and loop.time() values
+# from different loops (threads, successive asyncio.run calls) can coincide
+class _Wakeup:
+    """Shared timer and future for all waits on one loop due at one deadline"""
+    __slots__ = ("future", "handle", "waiters")
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, wakeups: Dict[float, "_Wakeup"],
+                 deadline: float):
+        self.future = loop.create_future()
+        self.handle = loop.call_at(deadline, self._fire, wakeups, deadline)
+        self.waiters = 0
+    
+    def _fire(self, wakeups: Dict[float, "_Wakeup"], deadline: float):
+        del wakeups[deadline]
+        if not self.future.done():
+            self.future.set_result(None)
+
+_WAKEUPS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[float, _Wakeup]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+async def simulate_latency(delay: float):
+    """Wait delay seconds; in batch mode, coalesce with other waits due in the same millisecond"""
+    if not _BATCH_MODE or delay <= 0:
+        await asyncio.sleep(max(delay, 0))  # sleep(0) is still a yield point at zero latency
+        return
+    loop = asyncio.get_running_loop()
+    wakeups = _WAKEUPS.get(loop)
+    if wakeups is None:
+        wakeups = _WAKEUPS[loop] = {}
+    deadline = math.ceil((loop.time() + delay) * 1000) / 1000
+    wakeup = wakeups.get(deadline)
+    if wakeup is None:
+        wakeup = wakeups[deadline] = _Wakeup(loop, wakeups, deadline)
+    wakeup.waiters += 1
+    try:
+        # Shielded: cancelling one waiter must not cancel the shared wakeup
+        await asyncio.shield(wakeup.future)
+    except asyncio.CancelledError:
+        wakeup.waiters -= 1
+        if not wakeup.waiters and wakeups.get(deadline) is wakeup:
+            # Last waiter gone: drop the timer so no stale entry outlives it
+            wakeup.handle.cancel()
+            del wakeups[deadline]
+        raise
+
+# Demo output goes through logging: with %-style arguments the tool-call line
+# (including repr(params)) is only formatted when DEBUG is enabled for this logger
+log = logging.getLogger("mcp.mock")
+
+# Tools each mock server advertises (what a real server answers to tools/list)
+_MOCK_SERVER_TOOLS = {
+    "filesystem": ("list_files", "read_file", "write_file"),
+    "git": ("git_status", "git_log", "git_add", "git_commit"),
+    "database": ("query", "execute"),
+    "fetch": ("fetch",),
+    "monitoring": ("query_metrics",),
+    "primary_db": ("query", "execute"),
+    "read_replica": ("query",),
+    "redis": ("get", "set"),
+    "rabbitmq": ("publish",),
+    "payments": ("charge",)
+}
+
+# Discovered tool sets by server name: listed once per process, reused on every reconnect
+_TOOL_CACHE: Dict[str, frozenset] = {}
+
+class CircuitOpenError(ConnectionError):
+    """Raised by an open breaker; not itself counted as a server failure"""
+
+class CircuitBreaker:
+    """Per-server circuit breaker: fast-fail after repeated errors until a cooldown passes"""
+    __slots__ = ("threshold", "cooldown", "failures", "opened_at")
+    
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+    
+    def check(self, server_name: str):
+        if self.failures < self.threshold:
+            return
+        # Cooldown over (half-open): let requests through; one more failure re-opens it
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return
+        # Open breaker: fail without paying the call latency
+        raise CircuitOpenError(f"Circuit open for {server_name}: failing fast")
+    
+    def record_success(self):
+        self.failures = 0
+    
+    def record_failure(self):
+        self.failures += 1
+        self.opened_at = time.monotonic()
+
+# One breaker per server name, shared by every session to that server
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+@dataclass(slots=True, frozen=True)
+class ToolResult:
+    """Result of one tool call"""
+    result: str
+    server: str
 
 # Simulate MCP client session (in real use, import from mcp library)
 class MockMCPSession:
     def __init__(self, server_name: str):
         self.server_name = server_name
         self.connected = False
+        self.tools: frozenset = frozenset()
+        self.down = False  # Failure injection: while True, every request times out
+        self._breaker = _BREAKERS.get(server_name)
+        if self._breaker is None:
+            self._breaker = _BREAKERS[server_name] = CircuitBreaker()
+    
+    async def _round_trip(self, delay: float):
+        """Send one simulated request (times out after the delay while the server is down)"""
+        await simulate_latency(delay)
+        if self.down:
+            raise ConnectionError(f"Service {self.server_name} timed out")
+    
+    async def list_tools(self) -> frozenset:
+        """Simulate the tools/list discovery round trip"""
+        await simulate_latency(0.05 * SIMULATED_LATENCY_SCALE)  # Simulate discovery time
+        return frozenset(_MOCK_SERVER_TOOLS.get(self.server_name, ()))
     
     async def connect(self):
-        print(f"🔌 Connecting to MCP Service: {self.server_name}")
-        await asyncio.sleep(0.1)  # Simulate connection time
+        log.debug("🔌 Connecting to MCP Service: %s", self.server_name)
+        await simulate_latency(0.1 * SIMULATED_LATENCY_SCALE)  # Simulate connection time
+        # Discovery only on the first connect to this server; later sessions hit the cache
+        tools = _TOOL_CACHE.get(self.server_name)
+        if tools is None:
+            tools = _TOOL_CACHE[self.server_name] = await self.list_tools()
+        self.tools = tools
         self.connected = True
     
     async def disconnect(self):
-        print(f"🔌 Disconnecting MCP Service: {self.server_name}")
-        await asyncio.sleep(0.05)  # Simulate disconnection time
+        log.debug("🔌 Disconnecting MCP Service: %s", self.server_name)
+        await simulate_latency(0.05 * SIMULATED_LATENCY_SCALE)  # Simulate disconnection time
         self.connected = False
     
-    async def call_tool(self, tool_name: str, params: Dict) -> Dict:
+    async def call_tool_fast(self, tool_name: str, params: Dict) -> str:
+        """Run a tool and return only its result string (no ToolResult built)"""
         if not self.connected:
             raise ConnectionError(f"Service {self.server_name} not connected")
+        if tool_name not in self.tools:
+            raise ValueError(f"Service {self.server_name} has no tool {tool_name}")
+        self._breaker.check(self.server_name)
+        
+        # Only the round trip counts toward the breaker: caller mistakes aren't outages
+        try:
+            await self._round_trip(0.05 * SIMULATED_LATENCY_SCALE)  # Simulate tool execution time
+        except Exception:
+            self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
         
         result = f"{self.server_name}_{tool_name}_result"
-        print(f"   🔧 [{self.server_name}] {tool_name}({params}) -> {result}")
-        await asyncio.sleep(0.05)  # Simulate tool execution time
-        return {"result": result, "server": self.server_name}
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("   🔧 [%s] %s(%r) -> %s", self.server_name, tool_name, params, result)
+        return result
+    
+    async def call_tool(self, tool_name: str, params: Dict) -> ToolResult:
+        """Run a tool and return the full result"""
+        return ToolResult(await self.call_tool_fast(tool_name, params), self.server_name)
+    
+    async def call_tools_batch(self, calls: List[Tuple[str, Dict]]) -> List[ToolResult]:
+        """Run several tool calls in one round trip (simulated pipelined request)"""
+        if not self.connected:
+            raise ConnectionError(f"Service {self.server_name} not connected")
+        for tool_name, _ in calls:
+            if tool_name not in self.tools:
+                raise ValueError(f"Service {self.server_name} has no tool {tool_name}")
+        self._breaker.check(self.server_name)
+        
+        # Only the round trip counts toward the breaker (see call_tool_fast)
+        try:
+            await self._round_trip(0.05 * SIMULATED_LATENCY_SCALE)  # One round trip for the whole batch
+        except Exception:
+            self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
+        
+        results = []
+        debug = log.isEnabledFor(logging.DEBUG)  # Checked once for the whole batch
+        for tool_name, params in calls:
+            result = f"{self.server_name}_{tool_name}_result"
+            if debug:
+                log.debug("   🔧 [%s] %s(%r) -> %s", self.server_name, tool_name, params, result)
+            results.append(ToolResult(result, self.server_name))
+        return results
 
 # =============================================================================
 # 1. Context Manager for a single MCP Service
 # =============================================================================
 
-@asynccontextmanager
-async def mcp_server_connection(server_name: str, command: str):
+class MCPServerConnection:
     """Single MCP Service connection manager"""
-    session = MockMCPSession(server_name)
-    try:
-        await session.connect()
-        yield session
-    finally:
-        if session.connected:
-            await session.disconnect()
+    __slots__ = ("server_name", "command", "session")
+    
+    def __init__(self, server_name: str, command: str):
+        self.server_name = server_name
+        self.command = command
+        self.session = None
+    
+    async def __aenter__(self) -> MockMCPSession:
+        self.session = MockMCPSession(self.server_name)
+        try:
+            await self.session.connect()
+        except BaseException:
+            # __aexit__ won't run if entering fails, so clean up here
+            if self.session.connected:
+                await self.session.disconnect()
+            raise
+        return self.session
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.session.connected:
+            await self.session.disconnect()
+        return False
+
+# =============================================================================
+# 1b. Session pool - connect once, lease per scope
+# =============================================================================
+
+class MCPSessionPool:
+    """Long-lived MCP sessions, leased per scope instead of reconnected (async with closes them)"""
+    
+    def __init__(self, max_idle: int = 20):
+        # Idle sessions kept per (server_name, command); extras beyond max_idle are disconnected
+        self._max_idle = max_idle
+        self._idle: Dict[Tuple[str, str], asyncio.Queue] = {}
+        # Connections the pool opened, by session, closed together (not one by one) at shutdown
+        self._connections: Dict[MockMCPSession, MCPServerConnection] = {}
+    
+    @asynccontextmanager
+    async def lease(self, server_name: str, command: str):
+        """Lease an idle session for (server_name, command), connecting a new one only if none is idle"""
+        idle = self._idle.get((server_name, command))
+        if idle is None:
+            idle = self._idle[(server_name, command)] = asyncio.Queue(self._max_idle)
+        if idle.empty():
+            # Nothing idle: open a long-lived session, disconnected when the pool closes
+            connection = MCPServerConnection(server_name, command)
+            session = await connection.__aenter__()
+            self._connections[session] = connection
+        else:
+            session = idle.get_nowait()
+        try:
+            yield session
+        except BaseException:
+            # The scope failed mid-use, so the session's state is unknown: don't hand it out again
+            await self._discard(session)
+            raise
+        try:
+            idle.put_nowait(session)
+        except asyncio.QueueFull:
+            # Pool already holds max_idle warm sessions for this key: drop this one
+            await self._discard(session)
+    
+    async def _discard(self, session: MockMCPSession):
+        """Disconnect a session and forget its connection, so it is neither reused nor closed twice"""
+        connection = self._connections.pop(session, None)
+        if connection is not None:
+            await connection.__aexit__(None, None, None)
+    
+    async def aclose(self):
+        """Disconnect every pooled session (call once at shutdown)"""
+        connections, self._connections = list(self._connections.values()), {}
+        self._idle.clear()
+        # Disconnects are independent: run them concurrently, so teardown costs one
+        # disconnect instead of one per session; all settle before any error is raised
+        results = await asyncio.gather(
+            *(connection.__aexit__(None, None, None) for connection in connections),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+        return False
+
+async def enter_all(stack: AsyncExitStack, *managers):
+    """
+    Enter independent async context managers concurrently on one stack
+    
+    All entries settle before any error is raised, so every manager that did
+    enter is registered on the stack and cleaned up.
+    """
+    results = await asyncio.gather(
+        *(stack.enter_async_context(cm) for cm in managers), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
 
 # =============================================================================
 # 2. Error Example - problems without using Context Manager
@@ -72,11 +357,11 @@ async def bad_example_without_context_manager():
     fs_session = MockMCPSession("filesystem")
     git_session = MockMCPSession("git")
     db_session = MockMCPSession("database")
+    sessions = (fs_session, git_session, db_session)
     
     try:
-        await fs_session.connect()
-        await git_session.connect() 
-        await db_session.connect()
+        # Connect concurrently - the connections are independent
+        await asyncio.gather(*(session.connect() for session in sessions))
         
         # Use services
         await fs_session.call_tool("list_files", {"path": "."})
@@ -88,13 +373,10 @@ async def bad_example_without_context_manager():
         print(f"💥 Error occurred: {e}")
         print("⚠️ Connections may not have been cleaned up properly!")
     
-    # Manual cleanup (easy to forget or make mistakes)
-    if fs_session.connected:
-        await fs_session.disconnect()
-    if git_session.connected:
-        await git_session.disconnect()
-    if db_session.connected:
-        await db_session.disconnect()
+    # Manual cleanup in reverse order (easy to forget or make mistakes)
+    for session in reversed(sessions):
+        if session.connected:
+            await session.disconnect()
     
     print()
 
@@ -108,17 +390,12 @@ async def good_example_with_async_exit_stack():
     print("-" * 50)
     
     async with AsyncExitStack() as stack:
-        # Establish multiple MCP connections in order
-        fs_session = await stack.enter_async_context(
-            mcp_server_connection("filesystem", "npx @mcp/server-filesystem")
-        )
-        
-        git_session = await stack.enter_async_context(
-            mcp_server_connection("git", "npx @mcp/server-git")
-        )
-        
-        db_session = await stack.enter_async_context(
-            mcp_server_connection("database", "npx @mcp/server-postgres")
+        # Establish multiple MCP connections concurrently: ~0.1s instead of ~0.3s
+        fs_session, git_session, db_session = await enter_all(
+            stack,
+            MCPServerConnection("filesystem", "npx @mcp/server-filesystem"),
+            MCPServerConnection("git", "npx @mcp/server-git"),
+            MCPServerConnection("database", "npx @mcp/server-postgres")
         )
         
         print("🚀 All MCP services connected, starting work...")
@@ -137,81 +414,121 @@ async def good_example_with_async_exit_stack():
     
     print("🧹 All MCP connections have been safely closed\n")
 
+# =============================================================================
+# 3b. Session pool - reuse connections across scopes
+# =============================================================================
+
+async def session_pool_demo():
+    """✅ Pooled sessions: connect once, lease per scope, discard after a failure"""
+    print("✅ Session Pool: connect once, lease per scope")
+    print("-" * 40)
+    
+    async with MCPSessionPool() as pool:
+        async with pool.lease("filesystem", "npx @mcp/server-filesystem") as first:
+            await first.call_tool("list_files", {"path": "."})
+        # The next scope gets the same connected session back - no reconnect
+        async with pool.lease("filesystem", "npx @mcp/server-filesystem") as second:
+            await second.call_tool("read_file", {"path": "README.md"})
+        print(f"♻️ Second lease reused the first session: {second is first}")
+        
+        try:
+            async with pool.lease("filesystem", "npx @mcp/server-filesystem") as session:
+                raise ValueError("Simulated business logic error")
+        except ValueError as e:
+            print(f"💥 Error occurred: {e}")
+        # A session from a failed scope is disconnected, not returned to the pool
+        print(f"🗑️ Failed scope's session was discarded: {not session.connected}")
+    
+    print("🧹 Pool closed: remaining idle sessions disconnected\n")
+
 # =============================================================================
 # 4. Real application scenario - local development environment integration
 # =============================================================================
 
+# MCP services required for the development environment, built once at import
+DEV_SERVICE_COMMANDS = {
+    # File system service - code file management
+    "filesystem": "npx @mcp/server-filesystem /project",
+    # Git service - version control
+    "git": "npx @mcp/server-git --repo /project",
+    # Database service - local test data
+    "database": "npx @mcp/server-postgres postgresql://localhost:5432/devdb",
+    # Fetch service - test data acquisition
+    "fetch": "npx @mcp/server-fetch"
+}
+
+@dataclass(slots=True)
+class DevServices:
+    """MCP sessions of the development environment (keys known up front)"""
+    filesystem: MockMCPSession
+    git: MockMCPSession
+    database: MockMCPSession
+    fetch: MockMCPSession
+
+@dataclass(slots=True)
+class DevContext:
+    """Local development environment handed to the caller"""
+    services: DevServices
+    project_path: str
+    environment: str
+    started_at: float
+
 @asynccontextmanager
-async def local_dev_environment():
-    """Local development environment MCP service integration"""
+async def local_dev_environment(pool: MCPSessionPool):
+    """Local development environment MCP service integration (sessions leased from pool)"""
     print("🏠 Setting up local development environment...")
+    loop = asyncio.get_running_loop()
     
     async with AsyncExitStack() as stack:
-        # All MCP services required for development environment
-        services = {}
-        
-        # File system service - code file management
-        services["filesystem"] = await stack.enter_async_context(
-            mcp_server_connection("filesystem", "npx @mcp/server-filesystem /project")
-        )
-        
-        # Git service - version control
-        services["git"] = await stack.enter_async_context(
-            mcp_server_connection("git", "npx @mcp/server-git --repo /project")
-        )
-        
-        # Database service - local test data
-        services["database"] = await stack.enter_async_context(
-            mcp_server_connection("database", "npx @mcp/server-postgres postgresql://localhost:5432/devdb")
-        )
-        
-        # Fetch service - test data acquisition
-        services["fetch"] = await stack.enter_async_context(
-            mcp_server_connection("fetch", "npx @mcp/server-fetch")
+        # All MCP services required for development environment, connected concurrently
+        sessions = await enter_all(
+            stack,
+            *(pool.lease(name, command) for name, command in DEV_SERVICE_COMMANDS.items())
         )
+        services = DevServices(**dict(zip(DEV_SERVICE_COMMANDS, sessions)))
         
         # Development environment context
-        dev_context = {
-            "services": services,
-            "project_path": "/project",
-            "environment": "development",
-            "started_at": asyncio.get_event_loop().time()
-        }
+        dev_context = DevContext(services, "/project", "development", loop.time())
         
         print("✅ Local development environment ready")
         yield dev_context
         
-        uptime = asyncio.get_event_loop().time() - dev_context["started_at"]
+        uptime = loop.time() - dev_context.started_at
         print(f"🏠 Development environment ran for {uptime:.2f} seconds")
 
-async def development_workflow():
+async def development_workflow(pool: MCPSessionPool):
     """Development workflow example"""
     print("🔧 Development workflow demo")
     print("-" * 30)
     
-    async with local_dev_environment() as env:
-        services = env["services"]
+    async with local_dev_environment(pool) as env:
+        services = env.services
         
         # 1. Check project status
         print("📋 Step 1: Check project status")
-        files = await services["filesystem"].call_tool("list_files", {"path": "./src"})
-        status = await services["git"].call_tool("git_status", {})
-        
         # 2. Fetch external data
         print("📋 Step 2: Fetch test data")
-        api_data = await services["fetch"].call_tool("fetch", {"url": "https://api.example.com/test"})
+        # 1 + 2 have no data dependency: status checks and fetch run concurrently
+        files, status, api_data = await asyncio.gather(
+            services.filesystem.call_tool("list_files", {"path": "./src"}),
+            services.git.call_tool("git_status", {}),
+            services.fetch.call_tool("fetch", {"url": "https://api.example.com/test"})
+        )
         
         # 3. Update database
         print("📋 Step 3: Update test database")
-        await services["database"].call_tool("execute", {
+        await services.database.call_tool_fast("execute", {
             "sql": "INSERT INTO test_data (data) VALUES ($1)",
             "params": [api_data]
         })
         
         # 4. Commit changes
         print("📋 Step 4: Commit code changes")
-        await services["git"].call_tool("git_add", {"files": ["test_data.sql"]})
-        await services["git"].call_tool("git_commit", {"message": "Add test data"})
+        # git_add and git_commit pipelined in one request
+        await services.git.call_tools_batch([
+            ("git_add", {"files": ["test_data.sql"]}),
+            ("git_commit", {"message": "Add test data"})
+        ])
         
         print("✅ Development workflow completed")
     
@@ -221,100 +538,156 @@ async def development_workflow():
 # 5. Production environment integration scenario
 # =============================================================================
 
-async def production_mcp_integration():
-    """Production environment MCP service integration"""
+# Batches per production run, and the cap on how many run at once; batches share
+# the pooled sessions, so the cap bounds concurrent use of each connection
+PRODUCTION_BATCHES = 3
+MAX_CONCURRENT_BATCHES = int(os.environ.get("MCP_DEMO_MAX_CONCURRENCY", "8"))
+
+# Stable, parameterized query text: one string for every batch, so the server can
+# reuse its prepared statement / plan instead of parsing a new query per batch
+_SELECT_ORDERS_SQL = "SELECT * FROM orders WHERE batch_id = $1"
+
+# Production MCP service config, built once at import
+PRODUCTION_SERVICE_COMMANDS = {
+    # Monitoring and logging
+    "monitoring": "mcp-server-prometheus",
+    # Database cluster
+    "primary_db": "mcp-server-postgres-primary",
+    "read_replica": "mcp-server-postgres-replica",
+    # Cache service
+    "redis": "mcp-server-redis",
+    # Message queue
+    "rabbitmq": "mcp-server-rabbitmq"
+}
+
+async def production_mcp_integration(pool: MCPSessionPool):
+    """Production environment MCP service integration (sessions leased from pool)"""
     print("🏭 Production environment MCP integration demo")
     print("-" * 40)
     
     async with AsyncExitStack() as stack:
-        # Production environment MCP service config
-        production_services = {}
-        
-        # Monitoring and logging
-        production_services["monitoring"] = await stack.enter_async_context(
-            mcp_server_connection("monitoring", "mcp-server-prometheus")
-        )
-        
-        # Database cluster
-        production_services["primary_db"] = await stack.enter_async_context(
-            mcp_server_connection("primary_db", "mcp-server-postgres-primary")
-        )
-        
-        production_services["read_replica"] = await stack.enter_async_context(
-            mcp_server_connection("read_replica", "mcp-server-postgres-replica")
-        )
-        
-        # Cache service
-        production_services["redis"] = await stack.enter_async_context(
-            mcp_server_connection("redis", "mcp-server-redis")
-        )
-        
-        # Message queue
-        production_services["rabbitmq"] = await stack.enter_async_context(
-            mcp_server_connection("rabbitmq", "mcp-server-rabbitmq")
+        # All production services, connected concurrently
+        sessions = await enter_all(
+            stack,
+            *(pool.lease(name, command) for name, command in PRODUCTION_SERVICE_COMMANDS.items())
         )
+        production_services = dict(zip(PRODUCTION_SERVICE_COMMANDS, sessions))
         
         print("🚀 All production environment services connected")
         
-        # Simulate production workload
-        tasks = []
-        for i in range(3):
-            task = asyncio.create_task(
-                simulate_production_workload(production_services, f"batch-{i}")
-            )
-            tasks.append(task)
+        # Semaphore keeps fan-out bounded however many batches are queued
+        limit = asyncio.Semaphore(min(PRODUCTION_BATCHES, MAX_CONCURRENT_BATCHES))
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        async def bounded_workload(batch_id: str):
+            async with limit:
+                return await simulate_production_workload(production_services, batch_id)
+        
+        # Simulate production workload - a failing batch cancels its siblings
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(bounded_workload(f"batch-{i}")) for i in range(PRODUCTION_BATCHES)
+            ]
+        results = [task.result() for task in tasks]
         print(f"📊 Processed {len(results)} batch tasks")
     
-    print("🏭 Production environment safely closed\n")
+    print("🏭 Production sessions returned to the pool (disconnected when it closes)\n")
 
 async def simulate_production_workload(services: Dict, batch_id: str):
     """Simulate production workload"""
     # Read data
     data = await services["read_replica"].call_tool("query", {
-        "sql": f"SELECT * FROM orders WHERE batch_id = '{batch_id}'"
+        "sql": _SELECT_ORDERS_SQL,
+        "params": [batch_id]
     })
     
-    # Process and cache
-    await services["redis"].call_tool("set", {
-        "key": f"processed_{batch_id}",
-        "value": data
-    })
-    
-    # Send message
-    await services["rabbitmq"].call_tool("publish", {
-        "queue": "processed_orders",
-        "message": {"batch_id": batch_id, "status": "completed"}
-    })
+    # Cache and notify in parallel - both only depend on the read; their results
+    # are unused, so the string-only fast path skips building ToolResults
+    await asyncio.gather(
+        services["redis"].call_tool_fast("set", {
+            "key": f"processed_{batch_id}",
+            "value": data
+        }),
+        services["rabbitmq"].call_tool_fast("publish", {
+            "queue": "processed_orders",
+            "message": {"batch_id": batch_id, "status": "completed"}
+        })
+    )
     
     return f"batch_{batch_id}_completed"
 
 # =============================================================================
-# Main program
+# 6. Failure containment - per-server circuit breaker
 # =============================================================================
 
-async def main():
-    print("🏠 Local MCP Service Integration Practice Demo")
-    print("=" * 60)
-    print("💡 Demonstrating why local integration of multiple MCP services requires Context Manager\n")
-    
-    # Demo bad approach
-    await bad_example_without_context_manager()
-    
-    # Demo correct approach
-    await good_example_with_async_exit_stack()
-    
-    # Real application scenarios
-    await development_workflow()
-    await production_mcp_integration()
+async def circuit_breaker_demo():
+    """A dead service: the first failures pay the full timeout, then the breaker fails fast"""
+    print("⚡ Circuit breaker demo")
+    print("-" * 30)
     
-    print("📚 Key Points:")
-    print("✅ When integrating multiple MCP services locally, Context Manager is essential")
-    print("✅ AsyncExitStack automatically manages lifecycles of multiple connections")
-    print("✅ Ensures exception safety and proper resource cleanup")
-    print("✅ Supports complex service dependencies and composition")
-    print("✅ Simplifies service orchestration for both development and production environments")
+    async with MCPServerConnection("payments", "mcp-server-payments") as session:
+        session.down = True  # Simulate an outage
+        try:
+            for attempt in range(1, 8):
+                start = time.perf_counter_ns()
+                try:
+                    await session.call_tool("charge", {"amount": 10})
+                except ConnectionError as e:
+                    elapsed_ms = (time.perf_counter_ns() - start) / 1e6
+                    print(f"   ❌ Attempt {attempt}: {e} ({elapsed_ms:.0f} ms)")
+        finally:
+            session.down = False
+            # Service back up: close the shared breaker so later runs (MCP_DEMO_REPS>1) start healthy
+            _BREAKERS[session.server_name].record_success()
+    print("⚡ After the threshold, calls fail in microseconds instead of waiting on the timeout\n")
+
+# =============================================================================
+# Main program
+# =============================================================================
+
+async def main(pool: Optional[MCPSessionPool] = None):
+    """Run every demo; pooled scenarios lease from pool, or from a private pool closed on return"""
+    async with AsyncExitStack() as stack:
+        if pool is None:
+            pool = await stack.enter_async_context(MCPSessionPool())
+        
+        print("🏠 Local MCP Service Integration Practice Demo")
+        print("=" * 60)
+        print("💡 Demonstrating why local integration of multiple MCP services requires Context Manager\n")
+        
+        # Demo bad approach
+        await bad_example_without_context_manager()
+        
+        # Demo correct approach
+        await good_example_with_async_exit_stack()
+        await session_pool_demo()
+        
+        # Real application scenarios
+        await development_workflow(pool)
+        await production_mcp_integration(pool)
+        await circuit_breaker_demo()
+        
+        print("📚 Key Points:")
+        print("✅ When integrating multiple MCP services locally, Context Manager is essential")
+        print("✅ AsyncExitStack automatically manages lifecycles of multiple connections")
+        print("✅ Pooled sessions connect once per pool; a failed scope's session is discarded")
+        print("✅ Ensures exception safety and proper resource cleanup")
+        print("✅ Supports complex service dependencies and composition")
+        print("✅ Simplifies service orchestration for both development and production environments")
+        print("✅ A per-server circuit breaker fails fast instead of waiting on a dead service")
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Demo output at DEBUG by default; MCP_DEMO_LOG_LEVEL=WARNING silences the
+    # per-call lines (e.g. when benchmarking with MCP_DEMO_LATENCY_SCALE=0)
+    logging.basicConfig(format="%(message)s", stream=sys.stdout)
+    log.setLevel(os.environ.get("MCP_DEMO_LOG_LEVEL", "DEBUG"))
+    # One loop for every repetition (MCP_DEMO_REPS), so pooled sessions stay
+    # connected across runs; uvloop is used when it is installed
+    reps = int(os.environ.get("MCP_DEMO_REPS", "1"))
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+        pool = MCPSessionPool()
+        try:
+            for _ in range(reps):
+                runner.run(main(pool))
+        finally:
+            # Disconnect pooled sessions once at shutdown
+            runner.run(pool.aclose())
@@ -10,24 +10,36 @@ Context Manager 是 Python with 语句背后的机制，确保资源正确获取
 import time
 from contextlib import contextmanager
 
-@contextmanager
-def simple_timer(task_name):
+class SimpleTimer:
     """最简单的计时器 Context Manager"""
-    print(f"⏰ 开始: {task_name}")
-    start = time.time()
-    try:
-        yield start  # yield 前是 setup，后是 cleanup
-    finally:
-        print(f"✅ 完成: {task_name} ({time.time() - start:.2f}s)")
+    __slots__ = ("task_name", "start")
+    
+    def __init__(self, task_name):
+        self.task_name = task_name
+        self.start = None
+    
+    def __enter__(self):
+        print(f"⏰ 开始: {self.task_name}")
+        # 返回的开始时间和计时都用同一个单调时钟
+        self.start = time.perf_counter_ns()
+        return self.start  # __enter__ 是 setup，__exit__ 是 cleanup
+    
+    def __exit__(self, exc_type, exc, tb):
+        print(f"✅ 完成: {self.task_name} ({(time.perf_counter_ns() - self.start) / 1e9:.2f}s)")
+        return False  # 不吞掉异常
 
-@contextmanager  
+def simple_timer(task_name):
+    """计时一段代码：`with simple_timer(name) as start:`（SimpleTimer 的函数式名称）"""
+    return SimpleTimer(task_name)
+
+@contextmanager
 def temp_config(config, key, value):
     """临时修改配置，退出时自动恢复"""
     original = config.get(key)
     config[key] = value
     print(f"🔄 临时设置 {key}={value}")
     try:
-        yield config
+        yield config  # yield 前是 setup，后是 cleanup
     finally:
         config[key] = original
         print(f"🔄 恢复 {key}={original}")
@@ -38,7 +50,7 @@ if __name__ == "__main__":
     # 1. 基础计时器
     with simple_timer("数据处理") as start:
         time.sleep(0.1)
-        print(f"   开始时间: {start:.2f}")
+        print(f"   开始时间 (perf_counter_ns): {start}")
     
     # 2. 临时配置
     config = {"debug": False}
@@ -47,4 +59,4 @@ if __name__ == "__main__":
         print(f"临时配置: {config}")
     print(f"恢复配置: {config}")
     
-    print("\n✅ 关键要点：yield 分隔 setup/cleanup，finally 确保清理执行")
\ No newline at end of file
+    print("\n✅ 关键要点：__enter__/__exit__（类写法）或 yield + finally（@contextmanager）把 setup 和 cleanup 分开，异常时 cleanup 也会执行")
\ No newline at end of file
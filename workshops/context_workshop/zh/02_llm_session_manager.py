@@ -9,32 +9,77 @@
 实际应用：客服机器人、批处理任务、成本监控
 """
 
-from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
 
-@contextmanager
-def llm_session(session_id, max_tokens=100):
-    """LLM 会话管理器"""
-    print(f"🚀 启动会话: {session_id}")
-    session = {"id": session_id, "messages": [], "tokens": 0, "max_tokens": max_tokens}
+try:
+    import tiktoken
+except ImportError:  # 可选依赖：没有 tiktoken 时退回粗略的 len // 4 估算
+    tiktoken = None
+
+@lru_cache(maxsize=8)
+def _encoder(model):
+    """按模型缓存 tiktoken 编码器（未安装 tiktoken 或无法加载时返回 None）"""
+    if tiktoken is None:
+        return None
     try:
-        yield session
-        print(f"✅ 会话完成: {session['id']}")
-    except Exception as e:
-        print(f"❌ 会话异常: {e}")
-        raise
-    finally:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        # 模型未知，或无法下载 BPE 文件（离线）：改用估算；
+        # 返回 None 也会把失败结果缓存下来，不会每次调用都重试
+        return None
+
+def count_tokens(content, model="gpt-4"):
+    """计算内容的 token 数（可用时使用真实 BPE）"""
+    enc = _encoder(model)
+    return len(enc.encode(content)) if enc else len(content) // 4
+
+@dataclass(slots=True)
+class Session:
+    """会话状态：使用 slots，属性访问代替字典键"""
+    id: str
+    max_tokens: int = 100
+    model: str = "gpt-4"
+    tokens: int = 0
+    messages: list = field(default_factory=list)
+
+class LLMSession:
+    """LLM 会话管理器"""
+    __slots__ = ("session_id", "max_tokens", "session")
+    
+    def __init__(self, session_id, max_tokens=100):
+        self.session_id = session_id
+        self.max_tokens = max_tokens
+        self.session = None
+    
+    def __enter__(self):
+        print(f"🚀 启动会话: {self.session_id}")
+        self.session = Session(self.session_id, self.max_tokens)
+        return self.session
+    
+    def __exit__(self, exc_type, exc, tb):
+        s = self.session
+        if exc_type is None:
+            print(f"✅ 会话完成: {s.id}")
+        elif issubclass(exc_type, Exception):
+            print(f"❌ 会话异常: {exc}")
         # 会话统计和清理
-        cost = session["tokens"] * 0.002 / 1000
-        print(f"📊 统计: {len(session['messages'])} 消息, {session['tokens']} tokens, ${cost:.4f}")
+        cost = s.tokens * 0.002 / 1000
+        print(f"📊 统计: {len(s.messages)} 消息, {s.tokens} tokens, ${cost:.4f}")
+        return False
+
+def llm_session(session_id, max_tokens=100):
+    """打开一个有 token 预算的对话会话（LLMSession 的函数式名称）"""
+    return LLMSession(session_id, max_tokens)
 
 def add_message(session, role, content):
     """添加消息到会话"""
-    tokens = len(content) // 4  # 简单 token 估算
-    session["messages"].append({"role": role, "content": content})
-    session["tokens"] += tokens
+    tokens = count_tokens(content, session.model)
+    session.messages.append({"role": role, "content": content})
+    session.tokens += tokens
     
-    if session["tokens"] > session["max_tokens"]:
-        print(f"⚠️ Token 超限: {session['tokens']}/{session['max_tokens']}")
+    if session.tokens > session.max_tokens:
+        print(f"⚠️ Token 超限: {session.tokens}/{session.max_tokens}")
     
     print(f"💬 {role}: {content[:30]}... ({tokens} tokens)")
 
@@ -10,18 +10,23 @@
 """
 
 import asyncio
+import os
 from contextlib import asynccontextmanager
 
+# 下面模拟延迟的缩放系数；WORKSHOP_LATENCY_SCALE=0 保留 await 让出点
+#（sleep(0) 仍会让出）但去掉等待，只留下 Context Manager 本身的开销
+SIMULATED_LATENCY_SCALE = float(os.environ.get("WORKSHOP_LATENCY_SCALE", "1"))
+
 @asynccontextmanager
 async def gpu_resource(gpu_id):
     """GPU 资源管理器"""
     print(f"🔧 分配 GPU-{gpu_id}")
-    await asyncio.sleep(0.1)  # 模拟异步资源分配
+    await asyncio.sleep(0.1 * SIMULATED_LATENCY_SCALE)  # 模拟异步资源分配
     try:
         yield f"GPU-{gpu_id}"
     finally:
         print(f"🔧 释放 GPU-{gpu_id}")
-        await asyncio.sleep(0.05)  # 模拟异步清理
+        await asyncio.sleep(0.05 * SIMULATED_LATENCY_SCALE)  # 模拟异步清理
 
 @asynccontextmanager
 async def async_llm_session(session_id):
@@ -38,7 +43,7 @@ async def process_llm_query(session, query):
     """模拟异步 LLM 查询处理"""
     session["tasks"].append(query)
     print(f"   🔄 处理: {query}")
-    await asyncio.sleep(0.1)  # 模拟异步处理时间
+    await asyncio.sleep(0.1 * SIMULATED_LATENCY_SCALE)  # 模拟异步处理时间
     return f"回复: {query}"
 
 async def main():
@@ -47,7 +52,7 @@ async def main():
     # 1. GPU 资源管理
     async with gpu_resource("A100") as gpu:
         print(f"   使用 {gpu} 进行计算")
-        await asyncio.sleep(0.05)
+        await asyncio.sleep(0.05 * SIMULATED_LATENCY_SCALE)
     
     # 2. 异步会话处理
     async with async_llm_session("async-chat") as session:
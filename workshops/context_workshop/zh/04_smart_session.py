@@ -11,36 +11,91 @@
 """
 
 import contextvars
-from contextlib import contextmanager
+import json
+from dataclasses import dataclass
+from typing import Optional
 
-# 全局上下文变量
-current_session = contextvars.ContextVar('current_session', default=None)
-current_model = contextvars.ContextVar('current_model', default='gpt-3.5-turbo')
+@dataclass(frozen=True, slots=True)
+class SessionState:
+    """当前会话与模型，打包在一起，每层嵌套只需一次 set/reset"""
+    session: Optional[dict] = None
+    model: str = "gpt-3.5-turbo"
 
-@contextmanager
-def smart_session(session_id, model="gpt-4"):
-    """智能会话管理器 - 自动设置全局上下文"""
-    print(f"🧠 智能会话: {session_id}")
-    session = {"id": session_id, "calls": [], "model": model}
+# 用一个上下文变量保存完整的会话状态
+current_state = contextvars.ContextVar('current_state', default=SessionState())
+
+class SmartSession:
+    """
+    智能会话管理器 - 自动设置全局上下文
+    
+    batch=True 时调用先排队，退出时一次性提交 -
+    适合对延迟不敏感的任务（夜间任务、离线分析）。submit_batch 接收
+    Batch API 的 JSONL 行，并按 custom_id 返回结果（默认使用本地模拟）。
+    """
+    __slots__ = ("session_id", "model", "batch", "submit_batch", "session", "token")
+    
+    def __init__(self, session_id, model="gpt-4", batch=False, submit_batch=None):
+        self.session_id = session_id
+        self.model = model
+        self.batch = batch
+        self.submit_batch = submit_batch or _mock_submit_batch
+        self.session = None
+        self.token = None
     
-    # 设置上下文变量
-    session_token = current_session.set(session)
-    model_token = current_model.set(model)
+    def __enter__(self):
+        print(f"🧠 智能会话: {self.session_id}")
+        self.session = {"id": self.session_id, "calls": [], "model": self.model, "batch": self.batch}
+        # 设置上下文变量
+        self.token = current_state.set(SessionState(self.session, self.model))
+        return self.session
     
-    try:
-        yield session
-    finally:
-        # 恢复上下文变量
-        current_session.reset(session_token)
-        current_model.reset(model_token)
-        print(f"📝 自动记录了 {len(session['calls'])} 次调用")
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None and self.batch and self.session["calls"]:
+                _submit_batch(self.session, self.submit_batch)
+        finally:
+            # 恢复上下文变量
+            current_state.reset(self.token)
+            print(f"📝 自动记录了 {len(self.session['calls'])} 次调用")
+        return False
+
+def _mock_submit_batch(lines):
+    """Batch API 的本地替身：逐行应答 JSONL 请求，按 custom_id 返回结果"""
+    # 真实 API：通过 client.files.create(purpose="batch") 上传，然后
+    # client.batches.create(input_file_id=..., endpoint="/v1/chat/completions", completion_window="24h")，
+    # 轮询直到完成，再按 custom_id 回填每个结果
+    results = {}
+    for line in lines:
+        request = json.loads(line)
+        results[request["custom_id"]] = f"AI回复: {request['body']['messages'][0]['content']}"
+    return results
+
+def _submit_batch(session, submit):
+    """将排队的调用序列化为 Batch API 的 JSONL 行，并回填结果"""
+    lines = [
+        json.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {"model": call["model"], "messages": [{"role": "user", "content": call["prompt"]}]}
+        })
+        for i, call in enumerate(session["calls"])
+    ]
+    results = submit(lines)
+    for i, call in enumerate(session["calls"]):
+        call["response"] = results[str(i)]
+    print(f"📦 批量提交: {len(lines)} 次调用合并为一个请求")
 
 def smart_llm_call(prompt):
     """智能 LLM 调用 - 自动感知当前会话"""
-    session = current_session.get()
-    model = current_model.get()
+    state = current_state.get()
+    session, model = state.session, state.model
     
-    if session:
+    if session and session["batch"]:
+        session["calls"].append({"prompt": prompt, "model": model, "response": None})
+        print(f"🤖 [{model}] {prompt[:20]}... (已加入批量队列)")
+        return None
+    elif session:
         session["calls"].append({"prompt": prompt, "model": model})
         print(f"🤖 [{model}] {prompt[:20]}... (已记录)")
     else:
@@ -52,7 +107,7 @@ if __name__ == "__main__":
     print("🧠 智能会话管理器演示\n")
     
     # 1. 智能会话 - 自动记录
-    with smart_session("auto-chat", "gpt-4") as session:
+    with SmartSession("auto-chat", "gpt-4") as session:
         smart_llm_call("什么是 contextvars？")
         smart_llm_call("如何在 LLM 中应用？")
         smart_llm_call("有什么实际案例？")
@@ -61,10 +116,16 @@ if __name__ == "__main__":
     smart_llm_call("这个调用不会被记录")
     
     # 3. 嵌套会话
-    with smart_session("outer-session"):
+    with SmartSession("outer-session"):
         smart_llm_call("外层会话")
-        with smart_session("inner-session"):
+        with SmartSession("inner-session"):
             smart_llm_call("内层会话")
         smart_llm_call("回到外层")
     
+    # 4. 批量会话 - 退出时统一提交
+    with SmartSession("nightly-report", batch=True) as session:
+        smart_llm_call("总结今天的日志")
+        smart_llm_call("列出异常")
+    print(f"   第一个批量结果: {session['calls'][0]['response']}")
+    
     print("\n✅ 关键要点：contextvars 实现全局状态感知，内部函数自动获取上下文")
\ No newline at end of file
@@ -6,62 +6,111 @@
 - 多层嵌套的资源依赖
 - 企业级系统的综合管理
 
-核心：多个 with 语句的嵌套使用
+核心：多个 with 语句的嵌套使用，可用一个 ExitStack 展平
 """
 
-from contextlib import contextmanager
 import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
 
-@contextmanager
-def budget_tracker(budget):
+@dataclass(slots=True)
+class Budget:
+    """预算状态"""
+    budget: float
+    spent: float = 0
+
+@dataclass(slots=True)
+class Session:
+    """批处理会话状态"""
+    id: str
+    operations: list = field(default_factory=list)
+
+class BudgetTracker:
     """预算追踪管理器"""
-    print(f"💰 预算控制: ${budget}")
-    tracker = {"budget": budget, "spent": 0}
-    try:
-        yield tracker
-    finally:
-        remaining = tracker["budget"] - tracker["spent"]
-        print(f"💰 预算结算: 花费 ${tracker['spent']:.3f}, 剩余 ${remaining:.3f}")
+    __slots__ = ("budget", "tracker")
+    
+    def __init__(self, budget):
+        self.budget = budget
+        self.tracker = None
+    
+    def __enter__(self):
+        print(f"💰 预算控制: ${self.budget}")
+        self.tracker = Budget(self.budget)
+        return self.tracker
+    
+    def __exit__(self, exc_type, exc, tb):
+        t = self.tracker
+        remaining = t.budget - t.spent
+        print(f"💰 预算结算: 花费 ${t.spent:.3f}, 剩余 ${remaining:.3f}")
+        return False
 
-@contextmanager
-def performance_monitor(task_name):
+def budget_tracker(budget):
+    """按预算跟踪花费（BudgetTracker 的函数式名称）"""
+    return BudgetTracker(budget)
+
+class PerformanceMonitor:
     """性能监控管理器"""
-    print(f"📊 性能监控: {task_name}")
-    start = time.time()
-    try:
-        yield {"task": task_name, "start_time": start}
-    finally:
-        duration = time.time() - start
-        print(f"📊 性能报告: {task_name} 耗时 {duration:.2f}s")
+    __slots__ = ("task_name", "start")
+    
+    def __init__(self, task_name):
+        self.task_name = task_name
+        self.start = None
+    
+    def __enter__(self):
+        print(f"📊 性能监控: {self.task_name}")
+        self.start = time.perf_counter_ns()
+        return {"task": self.task_name, "start_time": time.time()}
+    
+    def __exit__(self, exc_type, exc, tb):
+        duration = (time.perf_counter_ns() - self.start) / 1e9
+        print(f"📊 性能报告: {self.task_name} 耗时 {duration:.2f}s")
+        return False
 
-@contextmanager
-def simple_session(session_id):
+def performance_monitor(task_name):
+    """报告代码块的耗时（PerformanceMonitor 的函数式名称）"""
+    return PerformanceMonitor(task_name)
+
+class SimpleSession:
     """简化的会话管理器"""
-    print(f"🚀 会话: {session_id}")
-    session = {"id": session_id, "operations": []}
-    try:
-        yield session
-    finally:
-        print(f"🚀 会话结束: {session_id} ({len(session['operations'])} 操作)")
+    __slots__ = ("session_id", "session")
+    
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.session = None
+    
+    def __enter__(self):
+        print(f"🚀 会话: {self.session_id}")
+        self.session = Session(self.session_id)
+        return self.session
+    
+    def __exit__(self, exc_type, exc, tb):
+        print(f"🚀 会话结束: {self.session_id} ({len(self.session.operations)} 操作)")
+        return False
+
+def simple_session(session_id):
+    """记录一个批处理会话的操作（SimpleSession 的函数式名称）"""
+    return SimpleSession(session_id)
 
 def simulate_llm_call(session, budget, operation):
     """模拟 LLM 调用"""
     cost = 0.01  # 每次调用成本
-    session["operations"].append(operation)
-    budget["spent"] += cost
+    session.operations.append(operation)
+    budget.spent += cost
     print(f"   🤖 执行: {operation} (成本: ${cost})")
 
 if __name__ == "__main__":
     print("🔄 嵌套组合 Context Manager 演示\n")
     
-    # 三层嵌套：预算 + 监控 + 会话
-    with budget_tracker(0.05) as budget:
-        with performance_monitor("AI批处理") as monitor:
-            with simple_session("batch-001") as session:
-                simulate_llm_call(session, budget, "数据分析")
-                simulate_llm_call(session, budget, "报告生成")
-                simulate_llm_call(session, budget, "结果验证")
-                
-                print(f"   📈 当前花费: ${budget['spent']:.3f}")
+    # 三层：预算 + 监控 + 会话，放在同一个 ExitStack 上
+    #（与嵌套 with 相同的 LIFO 清理顺序，但管理器列表可以在运行时构建）
+    with ExitStack() as stack:
+        budget = stack.enter_context(budget_tracker(0.05))
+        monitor = stack.enter_context(performance_monitor("AI批处理"))
+        session = stack.enter_context(simple_session("batch-001"))
+        simulate_llm_call(session, budget, "数据分析")
+        simulate_llm_call(session, budget, "报告生成")
+        simulate_llm_call(session, budget, "结果验证")
+        
+        print(f"   📈 当前花费: ${budget.spent:.3f}")
     
     print("\n✅ 关键要点：嵌套 Context Manager 实现多层资源管理和监控")
\ No newline at end of file
@@ -5,54 +5,102 @@ AsyncExitStack 和 @asynccontextmanager 的关系：
 - @asynccontextmanager: 创建单个异步上下文管理器
 - AsyncExitStack: 管理多个异步上下文管理器的组合
 
-实际关系：AsyncExitStack 内部使用多个 @asynccontextmanager 创建的对象
+实际关系：AsyncExitStack 可以管理任意异步上下文管理器 - 既可以是下面这些基于类的
+（__aenter__/__aexit__）资源，也可以是像 application_context() 这样
+用 @asynccontextmanager 写成的生成器
 """
 
 import asyncio
-from contextlib import asynccontextmanager, AsyncExitStack
+import json
+import os
+import sys
+import time
+from contextlib import asynccontextmanager, contextmanager, AsyncExitStack
+from dataclasses import dataclass
+from typing import Any
+
+# 分阶段计时，便于性能分析：WORKSHOP_TIMINGS=1 时每个演示阶段向 stderr 输出一行 JSON，
+# stdout 上的演示输出保持不变
+TIMINGS_ENABLED = bool(os.environ.get("WORKSHOP_TIMINGS"))
+
+@contextmanager
+def timed(label):
+    """为包裹的代码块计时，并以 JSON 形式输出到 stderr（开启时）"""
+    if not TIMINGS_ENABLED:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        elapsed_ns = time.perf_counter_ns() - start
+        print(json.dumps({"phase": label, "ns": elapsed_ns}), file=sys.stderr)
 
 # =============================================================================
-# 1. 单个资源管理 - @asynccontextmanager
+# 1. 单个资源管理 - 基于类的异步上下文管理器
+#    （@asynccontextmanager 是同一协议的生成器简写）
 # =============================================================================
 
-@asynccontextmanager
-async def database_connection(db_name):
+class DatabaseConnection:
     """单个数据库连接管理器"""
-    print(f"🔌 连接数据库: {db_name}")
-    await asyncio.sleep(0.1)  # 模拟连接时间
-    connection = f"DB_{db_name}_connection"
-    try:
-        yield connection
-    finally:
-        print(f"🔌 关闭数据库: {db_name}")
+    __slots__ = ("db_name",)
+    
+    def __init__(self, db_name):
+        self.db_name = db_name
+    
+    async def __aenter__(self):
+        print(f"🔌 连接数据库: {self.db_name}")
+        await asyncio.sleep(0.1)  # 模拟连接时间
+        return f"DB_{self.db_name}_connection"
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        print(f"🔌 关闭数据库: {self.db_name}")
         await asyncio.sleep(0.05)  # 模拟关闭时间
+        return False
 
-@asynccontextmanager
-async def redis_cache(cache_name):
+class RedisCache:
     """单个 Redis 缓存管理器"""
-    print(f"⚡ 连接缓存: {cache_name}")
-    await asyncio.sleep(0.1)
-    cache = f"CACHE_{cache_name}_connection"
-    try:
-        yield cache
-    finally:
-        print(f"⚡ 关闭缓存: {cache_name}")
+    __slots__ = ("cache_name",)
+    
+    def __init__(self, cache_name):
+        self.cache_name = cache_name
+    
+    async def __aenter__(self):
+        print(f"⚡ 连接缓存: {self.cache_name}")
+        await asyncio.sleep(0.1)
+        return f"CACHE_{self.cache_name}_connection"
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        print(f"⚡ 关闭缓存: {self.cache_name}")
         await asyncio.sleep(0.05)
+        return False
 
-@asynccontextmanager
-async def message_queue(queue_name):
+class MessageQueue:
     """单个消息队列管理器"""
-    print(f"📬 连接队列: {queue_name}")
-    await asyncio.sleep(0.1)
-    queue = f"QUEUE_{queue_name}_connection"
-    try:
-        yield queue
-    finally:
-        print(f"📬 关闭队列: {queue_name}")
+    __slots__ = ("queue_name",)
+    
+    def __init__(self, queue_name):
+        self.queue_name = queue_name
+    
+    async def __aenter__(self):
+        print(f"📬 连接队列: {self.queue_name}")
+        await asyncio.sleep(0.1)
+        return f"QUEUE_{self.queue_name}_connection"
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        print(f"📬 关闭队列: {self.queue_name}")
         await asyncio.sleep(0.05)
+        return False
+
+# 资源类型 -> 管理器工厂，只构建一次，用于动态分发
+RESOURCE_FACTORIES = {
+    "database": DatabaseConnection,
+    "cache": RedisCache,
+    "queue": MessageQueue
+}
 
 # =============================================================================
-# 2. 传统嵌套方式 - 多个 @asynccontextmanager
+# 2. 传统嵌套方式 - 多个异步上下文管理器
 # =============================================================================
 
 async def traditional_nested_approach():
@@ -60,9 +108,9 @@ async def traditional_nested_approach():
     print("📍 传统嵌套方式:")
     print("-" * 30)
     
-    async with database_connection("users") as db:
-        async with redis_cache("session") as cache:
-            async with message_queue("notifications") as queue:
+    async with DatabaseConnection("users") as db:
+        async with RedisCache("session") as cache:
+            async with MessageQueue("notifications") as queue:
                 print(f"✅ 使用资源: {db}, {cache}, {queue}")
                 await asyncio.sleep(0.1)  # 模拟工作
     print()
@@ -71,17 +119,35 @@ async def traditional_nested_approach():
 # 3. AsyncExitStack 方式 - 动态管理多个资源
 # =============================================================================
 
+async def enter_all(stack, *managers):
+    """
+    在同一个栈上并发进入多个相互独立的异步上下文管理器
+    
+    各自的 setup 等待时间重叠而不是累加。所有进入操作结束后才抛出异常，
+    因此已成功进入的管理器都会注册 exit 并被清理。exit 按完成顺序的逆序执行，而不是参数顺序。
+    """
+    results = await asyncio.gather(
+        *(stack.enter_async_context(cm) for cm in managers), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
+
 async def async_exit_stack_approach():
     """AsyncExitStack 动态管理多个资源"""
     print("📍 AsyncExitStack 方式:")
     print("-" * 30)
     
     async with AsyncExitStack() as stack:
-       # 动态添加多个异步上下文管理器
-        db = await stack.enter_async_context(database_connection("users"))
-        cache = await stack.enter_async_context(redis_cache("session"))
-        queue = await stack.enter_async_context(message_queue("notifications"))
-         
+        # 并发获取三个资源：setup 约 0.1s 而不是 0.3s
+        db, cache, queue = await enter_all(
+            stack,
+            DatabaseConnection("users"),
+            RedisCache("session"),
+            MessageQueue("notifications")
+        )
+        
         print(f"✅ 使用资源: {db}, {cache}, {queue}")
         await asyncio.sleep(0.1)  # 模拟工作
     print()
@@ -96,8 +162,6 @@ async def dynamic_resource_management():
     print("-" * 30)
     
     async with AsyncExitStack() as stack:
-        resources = []
-        
         # 根据条件动态添加资源
         configs = [
             ("primary_db", "database"),
@@ -105,15 +169,11 @@ async def dynamic_resource_management():
             ("email_queue", "queue")
         ]
         
-        for name, resource_type in configs:
-            if resource_type == "database":
-                resource = await stack.enter_async_context(database_connection(name))
-            elif resource_type == "cache":
-                resource = await stack.enter_async_context(redis_cache(name))
-            elif resource_type == "queue":
-                resource = await stack.enter_async_context(message_queue(name))
-            
-            resources.append(resource)
+        # 先构建所有管理器，再一次性并发进入
+        resources = await enter_all(
+            stack, *(RESOURCE_FACTORIES[resource_type](name) for name, resource_type in configs)
+        )
+        for resource in resources:
             print(f"   ➕ 动态添加: {resource}")
         
         print(f"✅ 管理 {len(resources)} 个动态资源")
@@ -124,31 +184,45 @@ async def dynamic_resource_management():
 # 5. 组合使用 - AsyncExitStack 管理自定义 @asynccontextmanager
 # =============================================================================
 
+@dataclass(slots=True)
+class AppContext:
+    """交给调用方的应用资源"""
+    name: str
+    database: Any
+    cache: Any
+    message_queue: Any
+    startup_time: float
+
+async def start_application(stack, app_name):
+    """把应用的资源注册到调用方的栈上，并返回应用上下文"""
+    print(f"🚀 启动应用: {app_name}")
+    loop = asyncio.get_running_loop()
+    
+    # 应用需要的所有资源，并发获取
+    db, cache, queue = await enter_all(
+        stack,
+        DatabaseConnection("app_db"),
+        RedisCache("app_cache"),
+        MessageQueue("app_queue")
+    )
+    
+    # 创建应用上下文
+    app_context = AppContext(app_name, db, cache, queue, loop.time())
+    
+    def report_uptime():
+        uptime = loop.time() - app_context.startup_time
+        print(f"🚀 应用 {app_name} 运行了 {uptime:.2f} 秒")
+    
+    # 运行时长报告最后注册，因此会在资源关闭之前执行
+    stack.callback(report_uptime)
+    return app_context
+
 @asynccontextmanager
 async def application_context(app_name):
     """应用级上下文管理器 - 内部使用 AsyncExitStack"""
-    print(f"🚀 启动应用: {app_name}")
-    
+    # 单独使用时：由该上下文管理器自己持有一个栈
     async with AsyncExitStack() as stack:
-        # 应用需要的所有资源
-        db = await stack.enter_async_context(database_connection("app_db"))
-        cache = await stack.enter_async_context(redis_cache("app_cache"))
-        queue = await stack.enter_async_context(message_queue("app_queue"))
-        
-        # 创建应用上下文
-        app_context = {
-            "name": app_name,
-            "database": db,
-            "cache": cache,
-            "message_queue": queue,
-            "startup_time": asyncio.get_event_loop().time()
-        }
-        
-        try:
-            yield app_context
-        finally:
-            uptime = asyncio.get_event_loop().time() - app_context["startup_time"]
-            print(f"🚀 应用 {app_name} 运行了 {uptime:.2f} 秒")
+        yield await start_application(stack, app_name)
 
 async def combined_approach():
     """组合使用两种方式"""
@@ -157,11 +231,12 @@ async def combined_approach():
     
     # 外层使用 AsyncExitStack 管理多个应用
     async with AsyncExitStack() as stack:
-        # 每个应用内部使用 @asynccontextmanager + AsyncExitStack
+        # @asynccontextmanager 和其他异步上下文管理器一样进入（它自带一个内层栈）
         app1 = await stack.enter_async_context(application_context("WebServer"))
-        app2 = await stack.enter_async_context(application_context("APIGateway"))
+        # 也可以直接把应用的资源注册到这一个栈上，省去内层栈和生成器
+        app2 = await start_application(stack, "APIGateway")
         
-        print(f"✅ 运行应用: {app1['name']} 和 {app2['name']}")
+        print(f"✅ 运行应用: {app1.name} 和 {app2.name}")
         await asyncio.sleep(0.2)
     print()
 
@@ -177,8 +252,8 @@ async def error_handling_comparison():
     # AsyncExitStack 的错误处理
     try:
         async with AsyncExitStack() as stack:
-            db = await stack.enter_async_context(database_connection("test_db"))
-            cache = await stack.enter_async_context(redis_cache("test_cache"))
+            db = await stack.enter_async_context(DatabaseConnection("test_db"))
+            cache = await stack.enter_async_context(RedisCache("test_cache"))
             
             print("⚠️ 模拟错误...")
             raise ValueError("测试错误")
@@ -197,16 +272,21 @@ async def main():
     print("🔧 AsyncExitStack vs @asynccontextmanager 对比演示")
     print("=" * 60)
     
-    await traditional_nested_approach()
-    await async_exit_stack_approach()
-    await dynamic_resource_management()
-    await combined_approach()
-    await error_handling_comparison()
+    with timed("traditional_nested"):
+        await traditional_nested_approach()
+    with timed("async_exit_stack"):
+        await async_exit_stack_approach()
+    with timed("dynamic_resources"):
+        await dynamic_resource_management()
+    with timed("combined"):
+        await combined_approach()
+    with timed("error_handling"):
+        await error_handling_comparison()
     
     print("📚 关键区别总结:")
     print("✅ @asynccontextmanager: 创建单个异步上下文管理器")
     print("✅ AsyncExitStack: 管理多个异步上下文管理器")
-    print("✅ 关系: AsyncExitStack 使用 @asynccontextmanager 创建的对象")
+    print("✅ 关系: AsyncExitStack 可以管理任意异步上下文管理器，基于类的或 @asynccontextmanager 的都可以")
     print("✅ 优势: AsyncExitStack 支持动态添加和复杂的资源管理")
 
 if __name__ == "__main__":
@@ -16,48 +16,331 @@ Context Manager 解决方案：
 """
 
 import asyncio
+import logging
+import math
+import os
+import sys
+import time
+import weakref
 from contextlib import AsyncExitStack, asynccontextmanager
-from typing import Dict, Any
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import uvloop
+except ImportError:  # 可选：安装后使用更快的事件循环，否则使用标准库事件循环
+    uvloop = None
+
+# 下面模拟延迟的缩放系数；MCP_DEMO_LATENCY_SCALE=0 保留 await 让出点
+#（sleep(0) 仍会让出）但去掉等待，用于单独测量 Context Manager 栈本身的开销
+SIMULATED_LATENCY_SCALE = float(os.environ.get("MCP_DEMO_LATENCY_SCALE", "1"))
+
+# 压测模式（MCP_DEMO_BATCH_WAKEUPS=1，默认关闭）：同一事件循环上、在同一毫秒内结束的
+# 并发模拟等待共用一个定时器和一个 future，因此 N 个重叠的模拟调用只占用一个定时器堆条目，
+# 而不是 N 个（截止时间向上取整到 1 毫秒）。关闭时每次模拟等待都是普通的 asyncio.sleep(delay)。
+_BATCH_MODE = bool(os.environ.get("MCP_DEMO_BATCH_WAKEUPS"))
+
+# 唤醒对象按事件循环分开保存：future 属于创建它的事件循环，而不同事件循环
+#（多个线程、先后多次 asyncio.run）的 loop.time() 值可能相同
+class _Wakeup:
+    """同一事件循环上同一截止时间的所有等待共用的定时器和 future"""
+    __slots__ = ("future", "handle", "waiters")
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop, wakeups: Dict[float, "_Wakeup"],
+                 deadline: float):
+        self.future = loop.create_future()
+        self.handle = loop.call_at(deadline, self._fire, wakeups, deadline)
+        self.waiters = 0
+    
+    def _fire(self, wakeups: Dict[float, "_Wakeup"], deadline: float):
+        del wakeups[deadline]
+        if not self.future.done():
+            self.future.set_result(None)
+
+_WAKEUPS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[float, _Wakeup]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+async def simulate_latency(delay: float):
+    """等待 delay 秒；压测模式下与同一毫秒内到期的其他等待合并"""
+    if not _BATCH_MODE or delay <= 0:
+        await asyncio.sleep(max(delay, 0))  # 延迟缩放为 0 时 sleep(0) 仍然保留让出点
+        return
+    loop = asyncio.get_running_loop()
+    wakeups = _WAKEUPS.get(loop)
+    if wakeups is None:
+        wakeups = _WAKEUPS[loop] = {}
+    deadline = math.ceil((loop.time() + delay) * 1000) / 1000
+    wakeup = wakeups.get(deadline)
+    if wakeup is None:
+        wakeup = wakeups[deadline] = _Wakeup(loop, wakeups, deadline)
+    wakeup.waiters += 1
+    try:
+        # 使用 shield：取消某一个等待者不能取消共享的唤醒
+        await asyncio.shield(wakeup.future)
+    except asyncio.CancelledError:
+        wakeup.waiters -= 1
+        if not wakeup.waiters and wakeups.get(deadline) is wakeup:
+            # 最后一个等待者也取消了：撤销定时器，不留下过期条目
+            wakeup.handle.cancel()
+            del wakeups[deadline]
+        raise
+
+# 演示输出走 logging：使用 % 风格参数时，只有该 logger 开启 DEBUG
+# 才会格式化工具调用这一行（包括 repr(params)）
+log = logging.getLogger("mcp.mock")
+
+# 每个模拟服务器声明的工具（即真实服务器对 tools/list 的响应）
+_MOCK_SERVER_TOOLS = {
+    "filesystem": ("list_files", "read_file", "write_file"),
+    "git": ("git_status", "git_log", "git_add", "git_commit"),
+    "database": ("query", "execute"),
+    "fetch": ("fetch",),
+    "monitoring": ("query_metrics",),
+    "primary_db": ("query", "execute"),
+    "read_replica": ("query",),
+    "redis": ("get", "set"),
+    "rabbitmq": ("publish",),
+    "payments": ("charge",)
+}
+
+# 按服务器名缓存已发现的工具集合：每个进程只列举一次，之后每次重连都复用
+_TOOL_CACHE: Dict[str, frozenset] = {}
+
+class CircuitOpenError(ConnectionError):
+    """熔断器打开时抛出；它本身不计入服务器失败次数"""
+
+class CircuitBreaker:
+    """按服务器划分的熔断器：连续出错后快速失败，直到冷却期结束"""
+    __slots__ = ("threshold", "cooldown", "failures", "opened_at")
+    
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = 0.0
+    
+    def check(self, server_name: str):
+        if self.failures < self.threshold:
+            return
+        # 冷却期已过（半开）：放行请求；再失败一次就重新打开
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return
+        # 熔断器打开：直接失败，不再付出调用延迟
+        raise CircuitOpenError(f"{server_name} 的熔断器已打开：快速失败")
+    
+    def record_success(self):
+        self.failures = 0
+    
+    def record_failure(self):
+        self.failures += 1
+        self.opened_at = time.monotonic()
+
+# 每个服务器名一个熔断器，连接到该服务器的所有会话共用
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+
+@dataclass(slots=True, frozen=True)
+class ToolResult:
+    """单次工具调用的结果"""
+    result: str
+    server: str
 
 # 模拟 MCP 客户端会话（实际使用时从 mcp 库导入）
 class MockMCPSession:
     def __init__(self, server_name: str):
         self.server_name = server_name
         self.connected = False
+        self.tools: frozenset = frozenset()
+        self.down = False  # 故障注入：为 True 时每个请求都会超时
+        self._breaker = _BREAKERS.get(server_name)
+        if self._breaker is None:
+            self._breaker = _BREAKERS[server_name] = CircuitBreaker()
+    
+    async def _round_trip(self, delay: float):
+        """发送一次模拟请求（服务器宕机时会在延迟之后超时）"""
+        await simulate_latency(delay)
+        if self.down:
+            raise ConnectionError(f"服务器 {self.server_name} 请求超时")
+    
+    async def list_tools(self) -> frozenset:
+        """模拟 tools/list 工具发现的一次往返"""
+        await simulate_latency(0.05 * SIMULATED_LATENCY_SCALE)  # 模拟工具发现时间
+        return frozenset(_MOCK_SERVER_TOOLS.get(self.server_name, ()))
     
     async def connect(self):
-        print(f"🔌 连接到 MCP 服务器: {self.server_name}")
-        await asyncio.sleep(0.1)  # 模拟连接时间
+        log.debug("🔌 连接到 MCP 服务器: %s", self.server_name)
+        await simulate_latency(0.1 * SIMULATED_LATENCY_SCALE)  # 模拟连接时间
+        # 只在第一次连接该服务器时做工具发现，之后的会话直接命中缓存
+        tools = _TOOL_CACHE.get(self.server_name)
+        if tools is None:
+            tools = _TOOL_CACHE[self.server_name] = await self.list_tools()
+        self.tools = tools
         self.connected = True
     
     async def disconnect(self):
-        print(f"🔌 断开 MCP 服务器: {self.server_name}")
-        await asyncio.sleep(0.05)  # 模拟断连时间
+        log.debug("🔌 断开 MCP 服务器: %s", self.server_name)
+        await simulate_latency(0.05 * SIMULATED_LATENCY_SCALE)  # 模拟断连时间
         self.connected = False
     
-    async def call_tool(self, tool_name: str, params: Dict) -> Dict:
+    async def call_tool_fast(self, tool_name: str, params: Dict) -> str:
+        """执行工具并只返回结果字符串（不构建 ToolResult）"""
         if not self.connected:
             raise ConnectionError(f"服务器 {self.server_name} 未连接")
+        if tool_name not in self.tools:
+            raise ValueError(f"服务器 {self.server_name} 不提供工具 {tool_name}")
+        self._breaker.check(self.server_name)
+        
+        # 只有往返失败才计入熔断器：调用方的错误不算服务故障
+        try:
+            await self._round_trip(0.05 * SIMULATED_LATENCY_SCALE)  # 模拟工具执行时间
+        except Exception:
+            self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
         
         result = f"{self.server_name}_{tool_name}_result"
-        print(f"   🔧 [{self.server_name}] {tool_name}({params}) -> {result}")
-        await asyncio.sleep(0.05)  # 模拟工具执行时间
-        return {"result": result, "server": self.server_name}
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("   🔧 [%s] %s(%r) -> %s", self.server_name, tool_name, params, result)
+        return result
+    
+    async def call_tool(self, tool_name: str, params: Dict) -> ToolResult:
+        """执行工具并返回完整的结果"""
+        return ToolResult(await self.call_tool_fast(tool_name, params), self.server_name)
+    
+    async def call_tools_batch(self, calls: List[Tuple[str, Dict]]) -> List[ToolResult]:
+        """一次往返执行多个工具调用（模拟流水线请求）"""
+        if not self.connected:
+            raise ConnectionError(f"服务器 {self.server_name} 未连接")
+        for tool_name, _ in calls:
+            if tool_name not in self.tools:
+                raise ValueError(f"服务器 {self.server_name} 不提供工具 {tool_name}")
+        self._breaker.check(self.server_name)
+        
+        # 只有往返失败才计入熔断器（见 call_tool_fast）
+        try:
+            await self._round_trip(0.05 * SIMULATED_LATENCY_SCALE)  # 整批只需一次往返
+        except Exception:
+            self._breaker.record_failure()
+            raise
+        self._breaker.record_success()
+        
+        results = []
+        debug = log.isEnabledFor(logging.DEBUG)  # 整批只检查一次
+        for tool_name, params in calls:
+            result = f"{self.server_name}_{tool_name}_result"
+            if debug:
+                log.debug("   🔧 [%s] %s(%r) -> %s", self.server_name, tool_name, params, result)
+            results.append(ToolResult(result, self.server_name))
+        return results
 
 # =============================================================================
 # 1. 单个 MCP 服务器的 Context Manager
 # =============================================================================
 
-@asynccontextmanager
-async def mcp_server_connection(server_name: str, command: str):
+class MCPServerConnection:
     """单个 MCP 服务器连接管理器"""
-    session = MockMCPSession(server_name)
-    try:
-        await session.connect()
-        yield session
-    finally:
-        if session.connected:
-            await session.disconnect()
+    __slots__ = ("server_name", "command", "session")
+    
+    def __init__(self, server_name: str, command: str):
+        self.server_name = server_name
+        self.command = command
+        self.session = None
+    
+    async def __aenter__(self) -> MockMCPSession:
+        self.session = MockMCPSession(self.server_name)
+        try:
+            await self.session.connect()
+        except BaseException:
+            # 进入失败时不会调用 __aexit__，所以在这里清理
+            if self.session.connected:
+                await self.session.disconnect()
+            raise
+        return self.session
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.session.connected:
+            await self.session.disconnect()
+        return False
+
+# =============================================================================
+# 1b. 会话池 - 只连接一次，按作用域租用
+# =============================================================================
+
+class MCPSessionPool:
+    """长期保持的 MCP 会话池，按作用域租用而不是每次重新连接（async with 退出时关闭）"""
+    
+    def __init__(self, max_idle: int = 20):
+        # 每个 (server_name, command) 最多保留 max_idle 个空闲会话，多出的直接断开
+        self._max_idle = max_idle
+        self._idle: Dict[Tuple[str, str], asyncio.Queue] = {}
+        # 连接池打开的所有连接（按会话索引），关闭时一起断开（而不是逐个断开）
+        self._connections: Dict[MockMCPSession, MCPServerConnection] = {}
+    
+    @asynccontextmanager
+    async def lease(self, server_name: str, command: str):
+        """租用 (server_name, command) 的空闲会话，只有没有空闲会话时才新建连接"""
+        idle = self._idle.get((server_name, command))
+        if idle is None:
+            idle = self._idle[(server_name, command)] = asyncio.Queue(self._max_idle)
+        if idle.empty():
+            # 没有空闲会话：建立长期会话，连接池关闭时统一断开
+            connection = MCPServerConnection(server_name, command)
+            session = await connection.__aenter__()
+            self._connections[session] = connection
+        else:
+            session = idle.get_nowait()
+        try:
+            yield session
+        except BaseException:
+            # 作用域在使用中失败，会话状态未知：不再把它交给下一个使用者
+            await self._discard(session)
+            raise
+        try:
+            idle.put_nowait(session)
+        except asyncio.QueueFull:
+            # 该键下已保留 max_idle 个热会话：断开多余的这一个
+            await self._discard(session)
+    
+    async def _discard(self, session: MockMCPSession):
+        """断开会话并移除其连接，确保它既不会被复用也不会被重复关闭"""
+        connection = self._connections.pop(session, None)
+        if connection is not None:
+            await connection.__aexit__(None, None, None)
+    
+    async def aclose(self):
+        """断开池中所有会话（关闭时调用一次）"""
+        connections, self._connections = list(self._connections.values()), {}
+        self._idle.clear()
+        # 各个断开互不依赖：并发执行，关闭耗时只相当于一次断开而不是每个会话一次；
+        # 全部完成后才抛出错误
+        results = await asyncio.gather(
+            *(connection.__aexit__(None, None, None) for connection in connections),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+        return False
+
+async def enter_all(stack: AsyncExitStack, *managers):
+    """
+    在同一个栈上并发进入多个相互独立的异步上下文管理器
+    
+    所有进入操作结束后才抛出异常，因此已成功进入的管理器都会注册到栈上并被清理。
+    """
+    results = await asyncio.gather(
+        *(stack.enter_async_context(cm) for cm in managers), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return results
 
 # =============================================================================
 # 2. 错误示例 - 不使用 Context Manager 的问题
@@ -72,11 +355,11 @@ async def bad_example_without_context_manager():
     fs_session = MockMCPSession("filesystem")
     git_session = MockMCPSession("git")
     db_session = MockMCPSession("database")
+    sessions = (fs_session, git_session, db_session)
     
     try:
-        await fs_session.connect()
-        await git_session.connect() 
-        await db_session.connect()
+        # 并发连接 - 各连接之间相互独立
+        await asyncio.gather(*(session.connect() for session in sessions))
         
         # 使用服务
         await fs_session.call_tool("list_files", {"path": "."})
@@ -88,13 +371,10 @@ async def bad_example_without_context_manager():
         print(f"💥 发生错误: {e}")
         print("⚠️ 连接可能没有正确清理！")
     
-    # 手动清理（很容易忘记或出错）
-    if fs_session.connected:
-        await fs_session.disconnect()
-    if git_session.connected:
-        await git_session.disconnect()
-    if db_session.connected:
-        await db_session.disconnect()
+    # 按相反顺序手动清理（很容易忘记或出错）
+    for session in reversed(sessions):
+        if session.connected:
+            await session.disconnect()
     
     print()
 
@@ -108,17 +388,12 @@ async def good_example_with_async_exit_stack():
     print("-" * 50)
     
     async with AsyncExitStack() as stack:
-        # 按顺序建立多个 MCP 连接
-        fs_session = await stack.enter_async_context(
-            mcp_server_connection("filesystem", "npx @mcp/server-filesystem")
-        )
-        
-        git_session = await stack.enter_async_context(
-            mcp_server_connection("git", "npx @mcp/server-git")
-        )
-        
-        db_session = await stack.enter_async_context(
-            mcp_server_connection("database", "npx @mcp/server-postgres")
+        # 并发建立多个 MCP 连接：约 0.1 秒而不是 0.3 秒
+        fs_session, git_session, db_session = await enter_all(
+            stack,
+            MCPServerConnection("filesystem", "npx @mcp/server-filesystem"),
+            MCPServerConnection("git", "npx @mcp/server-git"),
+            MCPServerConnection("database", "npx @mcp/server-postgres")
         )
         
         print("🚀 所有 MCP 服务已连接，开始工作...")
@@ -137,81 +412,121 @@ async def good_example_with_async_exit_stack():
     
     print("🧹 所有 MCP 连接已安全关闭\n")
 
+# =============================================================================
+# 3b. 会话池 - 跨作用域复用连接
+# =============================================================================
+
+async def session_pool_demo():
+    """✅ 池化会话：只连接一次，按作用域租用，失败后丢弃"""
+    print("✅ 会话池：只连接一次，按作用域租用")
+    print("-" * 40)
+    
+    async with MCPSessionPool() as pool:
+        async with pool.lease("filesystem", "npx @mcp/server-filesystem") as first:
+            await first.call_tool("list_files", {"path": "."})
+        # 下一个作用域拿回同一个已连接的会话 - 无需重新连接
+        async with pool.lease("filesystem", "npx @mcp/server-filesystem") as second:
+            await second.call_tool("read_file", {"path": "README.md"})
+        print(f"♻️ 第二次租用复用了第一个会话: {second is first}")
+        
+        try:
+            async with pool.lease("filesystem", "npx @mcp/server-filesystem") as session:
+                raise ValueError("模拟业务逻辑错误")
+        except ValueError as e:
+            print(f"💥 发生错误: {e}")
+        # 失败作用域中的会话会被断开，而不是归还到池中
+        print(f"🗑️ 失败作用域的会话已被丢弃: {not session.connected}")
+    
+    print("🧹 连接池已关闭：剩余的空闲会话已断开\n")
+
 # =============================================================================
 # 4. 实际应用场景 - 本地开发环境集成
 # =============================================================================
 
+# 开发环境需要的 MCP 服务，导入时构建一次
+DEV_SERVICE_COMMANDS = {
+    # 文件系统服务 - 代码文件管理
+    "filesystem": "npx @mcp/server-filesystem /project",
+    # Git 服务 - 版本控制
+    "git": "npx @mcp/server-git --repo /project",
+    # 数据库服务 - 本地测试数据
+    "database": "npx @mcp/server-postgres postgresql://localhost:5432/devdb",
+    # 网页抓取服务 - 测试数据获取
+    "fetch": "npx @mcp/server-fetch"
+}
+
+@dataclass(slots=True)
+class DevServices:
+    """开发环境的 MCP 会话（键在编写时已确定）"""
+    filesystem: MockMCPSession
+    git: MockMCPSession
+    database: MockMCPSession
+    fetch: MockMCPSession
+
+@dataclass(slots=True)
+class DevContext:
+    """交给调用方的本地开发环境"""
+    services: DevServices
+    project_path: str
+    environment: str
+    started_at: float
+
 @asynccontextmanager
-async def local_dev_environment():
-    """本地开发环境的 MCP 服务集成"""
+async def local_dev_environment(pool: MCPSessionPool):
+    """本地开发环境的 MCP 服务集成（会话从 pool 租用）"""
     print("🏠 设置本地开发环境...")
+    loop = asyncio.get_running_loop()
     
     async with AsyncExitStack() as stack:
-        # 开发环境需要的所有 MCP 服务
-        services = {}
-        
-        # 文件系统服务 - 代码文件管理
-        services["filesystem"] = await stack.enter_async_context(
-            mcp_server_connection("filesystem", "npx @mcp/server-filesystem /project")
-        )
-        
-        # Git 服务 - 版本控制
-        services["git"] = await stack.enter_async_context(
-            mcp_server_connection("git", "npx @mcp/server-git --repo /project")
-        )
-        
-        # 数据库服务 - 本地测试数据
-        services["database"] = await stack.enter_async_context(
-            mcp_server_connection("database", "npx @mcp/server-postgres postgresql://localhost:5432/devdb")
-        )
-        
-        # 网页抓取服务 - 测试数据获取
-        services["fetch"] = await stack.enter_async_context(
-            mcp_server_connection("fetch", "npx @mcp/server-fetch")
+        # 开发环境需要的所有 MCP 服务，并发连接
+        sessions = await enter_all(
+            stack,
+            *(pool.lease(name, command) for name, command in DEV_SERVICE_COMMANDS.items())
         )
+        services = DevServices(**dict(zip(DEV_SERVICE_COMMANDS, sessions)))
         
         # 开发环境上下文
-        dev_context = {
-            "services": services,
-            "project_path": "/project",
-            "environment": "development",
-            "started_at": asyncio.get_event_loop().time()
-        }
+        dev_context = DevContext(services, "/project", "development", loop.time())
         
         print("✅ 本地开发环境就绪")
         yield dev_context
         
-        uptime = asyncio.get_event_loop().time() - dev_context["started_at"]
+        uptime = loop.time() - dev_context.started_at
         print(f"🏠 开发环境运行了 {uptime:.2f} 秒")
 
-async def development_workflow():
+async def development_workflow(pool: MCPSessionPool):
     """开发工作流示例"""
     print("🔧 开发工作流演示")
     print("-" * 30)
     
-    async with local_dev_environment() as env:
-        services = env["services"]
+    async with local_dev_environment(pool) as env:
+        services = env.services
         
         # 1. 检查项目状态
         print("📋 步骤 1: 检查项目状态")
-        files = await services["filesystem"].call_tool("list_files", {"path": "./src"})
-        status = await services["git"].call_tool("git_status", {})
-        
         # 2. 获取外部数据
         print("📋 步骤 2: 获取测试数据")
-        api_data = await services["fetch"].call_tool("fetch", {"url": "https://api.example.com/test"})
+        # 步骤 1 和 2 之间没有数据依赖：状态检查和数据获取并发执行
+        files, status, api_data = await asyncio.gather(
+            services.filesystem.call_tool("list_files", {"path": "./src"}),
+            services.git.call_tool("git_status", {}),
+            services.fetch.call_tool("fetch", {"url": "https://api.example.com/test"})
+        )
         
         # 3. 更新数据库
         print("📋 步骤 3: 更新测试数据库")
-        await services["database"].call_tool("execute", {
+        await services.database.call_tool_fast("execute", {
             "sql": "INSERT INTO test_data (data) VALUES ($1)",
             "params": [api_data]
         })
         
         # 4. 提交更改
         print("📋 步骤 4: 提交代码更改")
-        await services["git"].call_tool("git_add", {"files": ["test_data.sql"]})
-        await services["git"].call_tool("git_commit", {"message": "Add test data"})
+        # git_add 和 git_commit 合并为一次流水线请求
+        await services.git.call_tools_batch([
+            ("git_add", {"files": ["test_data.sql"]}),
+            ("git_commit", {"message": "Add test data"})
+        ])
         
         print("✅ 开发工作流完成")
     
@@ -221,100 +536,156 @@ async def development_workflow():
 # 5. 生产环境集成场景
 # =============================================================================
 
-async def production_mcp_integration():
-    """生产环境的 MCP 服务集成"""
+# 每次生产运行的批次数，以及同时运行批次数的上限；各批次共享池中的会话，
+# 因此该上限也限制了每个连接的并发使用
+PRODUCTION_BATCHES = 3
+MAX_CONCURRENT_BATCHES = int(os.environ.get("MCP_DEMO_MAX_CONCURRENCY", "8"))
+
+# 固定的参数化查询语句：所有批次共用同一个字符串，服务器可以复用预编译语句和执行计划，
+# 而不是每个批次都解析一条新查询
+_SELECT_ORDERS_SQL = "SELECT * FROM orders WHERE batch_id = $1"
+
+# 生产环境的 MCP 服务配置，导入时构建一次
+PRODUCTION_SERVICE_COMMANDS = {
+    # 监控和日志
+    "monitoring": "mcp-server-prometheus",
+    # 数据库集群
+    "primary_db": "mcp-server-postgres-primary",
+    "read_replica": "mcp-server-postgres-replica",
+    # 缓存服务
+    "redis": "mcp-server-redis",
+    # 消息队列
+    "rabbitmq": "mcp-server-rabbitmq"
+}
+
+async def production_mcp_integration(pool: MCPSessionPool):
+    """生产环境的 MCP 服务集成（会话从 pool 租用）"""
     print("🏭 生产环境 MCP 集成演示")
     print("-" * 40)
     
     async with AsyncExitStack() as stack:
-        # 生产环境的 MCP 服务配置
-        production_services = {}
-        
-        # 监控和日志
-        production_services["monitoring"] = await stack.enter_async_context(
-            mcp_server_connection("monitoring", "mcp-server-prometheus")
-        )
-        
-        # 数据库集群
-        production_services["primary_db"] = await stack.enter_async_context(
-            mcp_server_connection("primary_db", "mcp-server-postgres-primary")
-        )
-        
-        production_services["read_replica"] = await stack.enter_async_context(
-            mcp_server_connection("read_replica", "mcp-server-postgres-replica")
-        )
-        
-        # 缓存服务
-        production_services["redis"] = await stack.enter_async_context(
-            mcp_server_connection("redis", "mcp-server-redis")
-        )
-        
-        # 消息队列
-        production_services["rabbitmq"] = await stack.enter_async_context(
-            mcp_server_connection("rabbitmq", "mcp-server-rabbitmq")
+        # 生产环境的所有服务，并发连接
+        sessions = await enter_all(
+            stack,
+            *(pool.lease(name, command) for name, command in PRODUCTION_SERVICE_COMMANDS.items())
         )
+        production_services = dict(zip(PRODUCTION_SERVICE_COMMANDS, sessions))
         
         print("🚀 生产环境所有服务已连接")
         
-        # 模拟生产工作负载
-        tasks = []
-        for i in range(3):
-            task = asyncio.create_task(
-                simulate_production_workload(production_services, f"batch-{i}")
-            )
-            tasks.append(task)
+        # 无论排队多少批次，信号量都会限制扇出数量
+        limit = asyncio.Semaphore(min(PRODUCTION_BATCHES, MAX_CONCURRENT_BATCHES))
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        async def bounded_workload(batch_id: str):
+            async with limit:
+                return await simulate_production_workload(production_services, batch_id)
+        
+        # 模拟生产工作负载 - 任一批次失败会取消其他批次
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(bounded_workload(f"batch-{i}")) for i in range(PRODUCTION_BATCHES)
+            ]
+        results = [task.result() for task in tasks]
         print(f"📊 处理了 {len(results)} 个批次任务")
     
-    print("🏭 生产环境已安全关闭\n")
+    print("🏭 生产环境会话已归还连接池（连接池关闭时断开）\n")
 
 async def simulate_production_workload(services: Dict, batch_id: str):
     """模拟生产工作负载"""
     # 读取数据
     data = await services["read_replica"].call_tool("query", {
-        "sql": f"SELECT * FROM orders WHERE batch_id = '{batch_id}'"
+        "sql": _SELECT_ORDERS_SQL,
+        "params": [batch_id]
     })
     
-    # 处理并缓存
-    await services["redis"].call_tool("set", {
-        "key": f"processed_{batch_id}",
-        "value": data
-    })
-    
-    # 发送消息
-    await services["rabbitmq"].call_tool("publish", {
-        "queue": "processed_orders",
-        "message": {"batch_id": batch_id, "status": "completed"}
-    })
+    # 缓存和通知并行执行 - 两者都只依赖读取结果；它们的返回值没有被使用，
+    # 因此走只返回字符串的快速路径，省去构建 ToolResult
+    await asyncio.gather(
+        services["redis"].call_tool_fast("set", {
+            "key": f"processed_{batch_id}",
+            "value": data
+        }),
+        services["rabbitmq"].call_tool_fast("publish", {
+            "queue": "processed_orders",
+            "message": {"batch_id": batch_id, "status": "completed"}
+        })
+    )
     
     return f"batch_{batch_id}_completed"
 
 # =============================================================================
-# 主程序
+# 6. 故障隔离 - 按服务器划分的熔断器
 # =============================================================================
 
-async def main():
-    print("🏠 本地 MCP 服务集成实战演示")
-    print("=" * 60)
-    print("💡 展示为什么本地集成多个 MCP 服务需要 Context Manager\n")
-    
-    # 演示错误做法
-    await bad_example_without_context_manager()
-    
-    # 演示正确做法
-    await good_example_with_async_exit_stack()
-    
-    # 实际应用场景
-    await development_workflow()
-    await production_mcp_integration()
+async def circuit_breaker_demo():
+    """服务宕机：最初几次失败要付出完整的超时，之后熔断器直接快速失败"""
+    print("⚡ 熔断器演示")
+    print("-" * 30)
     
-    print("📚 关键要点:")
-    print("✅ 本地集成多个 MCP 服务时，Context Manager 是必需的")
-    print("✅ AsyncExitStack 自动管理多个连接的生命周期")
-    print("✅ 确保异常安全和资源正确清理")
-    print("✅ 支持复杂的服务依赖和组合")
-    print("✅ 简化开发和生产环境的服务编排")
+    async with MCPServerConnection("payments", "mcp-server-payments") as session:
+        session.down = True  # 模拟服务宕机
+        try:
+            for attempt in range(1, 8):
+                start = time.perf_counter_ns()
+                try:
+                    await session.call_tool("charge", {"amount": 10})
+                except ConnectionError as e:
+                    elapsed_ms = (time.perf_counter_ns() - start) / 1e6
+                    print(f"   ❌ 第 {attempt} 次调用: {e}（{elapsed_ms:.0f} ms）")
+        finally:
+            session.down = False
+            # 服务恢复：关闭共享的熔断器，之后的运行（MCP_DEMO_REPS>1）从健康状态开始
+            _BREAKERS[session.server_name].record_success()
+    print("⚡ 超过阈值后，调用在微秒级内失败，而不是等待超时\n")
+
+# =============================================================================
+# 主程序
+# =============================================================================
+
+async def main(pool: Optional[MCPSessionPool] = None):
+    """运行所有演示；池化场景从 pool 租用会话，未传入时使用私有连接池并在返回时关闭"""
+    async with AsyncExitStack() as stack:
+        if pool is None:
+            pool = await stack.enter_async_context(MCPSessionPool())
+        
+        print("🏠 本地 MCP 服务集成实战演示")
+        print("=" * 60)
+        print("💡 展示为什么本地集成多个 MCP 服务需要 Context Manager\n")
+        
+        # 演示错误做法
+        await bad_example_without_context_manager()
+        
+        # 演示正确做法
+        await good_example_with_async_exit_stack()
+        await session_pool_demo()
+        
+        # 实际应用场景
+        await development_workflow(pool)
+        await production_mcp_integration(pool)
+        await circuit_breaker_demo()
+        
+        print("📚 关键要点:")
+        print("✅ 本地集成多个 MCP 服务时，Context Manager 是必需的")
+        print("✅ AsyncExitStack 自动管理多个连接的生命周期")
+        print("✅ 会话池让每个服务在池内只连接一次；失败作用域的会话会被丢弃")
+        print("✅ 确保异常安全和资源正确清理")
+        print("✅ 支持复杂的服务依赖和组合")
+        print("✅ 简化开发和生产环境的服务编排")
+        print("✅ 按服务器划分的熔断器在服务宕机时快速失败，而不是反复等待")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # 默认以 DEBUG 级别输出演示信息；MCP_DEMO_LOG_LEVEL=WARNING 可关闭逐次调用的输出
+    #（例如配合 MCP_DEMO_LATENCY_SCALE=0 做基准测试时）
+    logging.basicConfig(format="%(message)s", stream=sys.stdout)
+    log.setLevel(os.environ.get("MCP_DEMO_LOG_LEVEL", "DEBUG"))
+    # 所有重复运行（MCP_DEMO_REPS）共用一个事件循环，池中的会话在多次运行间保持连接；
+    # 安装了 uvloop 时使用 uvloop
+    reps = int(os.environ.get("MCP_DEMO_REPS", "1"))
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+        pool = MCPSessionPool()
+        try:
+            for _ in range(reps):
+                runner.run(main(pool))
+        finally:
+            # 关闭时统一断开池中的会话
+            runner.run(pool.aclose())
\ No newline at end of file